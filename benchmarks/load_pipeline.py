@@ -0,0 +1,192 @@
+"""
+Load-tests the upload and matching endpoints end to end at a fixed concurrency
+and reports latency percentiles and throughput.
+
+Each pipeline is one user: connect to /ws/updates, POST a generated PDF to
+/resumes/upload, wait for the "analyzed" update, POST /jobs/match, and wait
+for the "completed" update. Requests go through the running server, so upload
+streaming, PDF extraction, the task queue, the workers and the status relay
+are all measured. Start the stub, the API and (optionally) workers first:
+
+    python -m benchmarks.stub_llm_server --port 9000
+    export BASE_URL=http://127.0.0.1:9000/v1 GEMINI_API_KEY=stub SECRET_KEY=x ALGORITHM=HS256 ACCESS_TOKEN_EXPIRE_MINUTES=30
+    uvicorn main:app --port 8000 --workers 2
+    python -m benchmarks.load_pipeline --api-url http://127.0.0.1:8000 --resumes 200 --concurrency 20
+
+Every resume is distinct and matches bypass the cache, so every pipeline reaches the model.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from typing import List
+
+import fitz  # PyMuPDF
+import httpx
+import websockets
+
+SKILLS = ["Python", "FastAPI", "SQL", "Docker", "AWS", "React", "Kubernetes", "Redis", "Kafka", "Terraform"]
+
+JOB_DESCRIPTION = (
+    "We are hiring a Backend Engineer with 3+ years of Python experience. "
+    "Must know FastAPI, PostgreSQL and Docker; AWS and Kubernetes are a plus."
+)
+
+PASSWORD = "load-test-password"
+
+
+def synthetic_resume(i: int) -> str:
+    rng = random.Random(i)
+    skills = ", ".join(rng.sample(SKILLS, 5))
+    return (
+        f"Candidate {i}\nSoftware Engineer at Company {i % 17} (2019 - 2024)\n"
+        f"Skills: {skills}\nEducation: BSc Computer Science\n"
+        f"Built and operated services handling {rng.randint(1, 50)}k requests per minute."
+    )
+
+
+def synthetic_pdf(text: str) -> bytes:
+    doc = fitz.open()
+    doc.new_page().insert_textbox(fitz.Rect(40, 40, 570, 800), text, fontsize=10)
+    content = doc.tobytes()
+    doc.close()
+    return content
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))], 2)
+
+
+def summarize(values: List[float]) -> dict:
+    return {
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": round(max(values), 2) if values else 0
+    }
+
+
+async def create_user(client: httpx.AsyncClient, email: str, admin: bool = False) -> str:
+    """Register a user and return its bearer token"""
+    response = await client.post("/users/register/", json={
+        "full_name": email.split("@")[0], "email": email, "password": PASSWORD, "admin": admin
+    })
+    response.raise_for_status()
+    response = await client.post("/auth/login", json={"email": email, "password": PASSWORD})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def wait_for(ws, message_type: str, done_status: str, timeout: float) -> dict:
+    """The first update of this type that finishes the step; raises on "failed" """
+    async def receive() -> dict:
+        while True:
+            message = json.loads(await ws.recv())
+            if message.get("type") != message_type:
+                continue
+            if message["status"] == "failed":
+                raise RuntimeError(message["message"])
+            if message["status"] == done_status:
+                return message
+    return await asyncio.wait_for(receive(), timeout)
+
+
+async def run(api_url: str, resumes: int, concurrency: int, timeout: float) -> dict:
+    run_id = uuid.uuid4().hex[:8]
+    ws_url = api_url.replace("http", "ws", 1) + "/ws/updates"
+    limits = httpx.Limits(max_connections=concurrency * 2)
+
+    async with httpx.AsyncClient(base_url=api_url, timeout=timeout, limits=limits) as client:
+        admin_token = await create_user(client, f"load-{run_id}-admin@example.com", admin=True)
+        setup = asyncio.Semaphore(concurrency)
+
+        async def setup_user(i: int) -> str:
+            async with setup:
+                return await create_user(client, f"load-{run_id}-{i}@example.com")
+
+        tokens = await asyncio.gather(*(setup_user(i) for i in range(resumes)))
+        pdfs = [synthetic_pdf(synthetic_resume(i)) for i in range(resumes)]
+
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = {"upload": [], "analysis": [], "match": [], "pipeline": []}
+        failures = 0
+
+        async def pipeline(i: int):
+            nonlocal failures
+            headers = {"Authorization": f"Bearer {tokens[i]}"}
+            async with semaphore:
+                try:
+                    async with websockets.connect(f"{ws_url}?token={tokens[i]}") as ws:
+                        await ws.recv()  # welcome
+                        started = time.perf_counter()
+
+                        response = await client.post(
+                            "/resumes/upload", headers=headers,
+                            files={"file": (f"candidate-{i}.pdf", pdfs[i], "application/pdf")}
+                        )
+                        response.raise_for_status()
+                        uploaded = time.perf_counter()
+                        await wait_for(ws, "resume_update", "analyzed", timeout)
+                        analyzed = time.perf_counter()
+
+                        response = await client.post("/jobs/match", headers=headers, json={
+                            "title": "Backend Engineer", "job_description": JOB_DESCRIPTION, "use_cache": False
+                        })
+                        response.raise_for_status()
+                        await wait_for(ws, "job_match_update", "completed", timeout)
+                        matched = time.perf_counter()
+                except Exception as e:
+                    failures += 1
+                    print(f"❌ Pipeline {i} failed: {type(e).__name__}: {e}")
+                    return
+
+            latencies["upload"].append((uploaded - started) * 1000)
+            latencies["analysis"].append((analyzed - uploaded) * 1000)
+            latencies["match"].append((matched - analyzed) * 1000)
+            latencies["pipeline"].append((matched - started) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(pipeline(i) for i in range(resumes)))
+        elapsed = time.perf_counter() - started
+
+        admin_headers = {"Authorization": f"Bearer {admin_token}"}
+        performance = (await client.get("/admin/performance", headers=admin_headers)).json()
+        queue = (await client.get("/admin/queue", headers=admin_headers, params={"dead_limit": 5})).json()
+
+    succeeded = len(latencies["pipeline"])
+    return {
+        "pipelines": resumes,
+        "concurrency": concurrency,
+        "succeeded": succeeded,
+        "failed": failures,
+        "elapsed_s": round(elapsed, 2),
+        "pipelines_per_s": round(succeeded / elapsed, 2) if elapsed else 0,
+        "latency_ms": {step: summarize(values) for step, values in latencies.items()},
+        # Counters of the web process that served /admin/performance
+        "server": {
+            key: performance.get(key)
+            for key in ("model_tiering", "llm_rate_limiter", "llm_retries", "llm_http_pool", "pdf_extraction", "status_relay")
+        },
+        "task_queue": queue
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--api-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--resumes", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds to wait for each step")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.api_url.rstrip("/"), args.resumes, args.concurrency, args.timeout))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Times PDF text extraction over documents of 1 to 200 pages.
+
+Three ways are compared on the same generated PDFs:
+  - inline:  the pool's worker function called in this process, pages walked serially
+  - pool:    the extraction pool with page sharding off (one worker per document)
+  - sharded: the extraction pool splitting pages across workers
+
+    SECRET_KEY=x ALGORITHM=HS256 ACCESS_TOKEN_EXPIRE_MINUTES=30 GEMINI_API_KEY=stub BASE_URL=http://localhost \\
+        python -m benchmarks.pdf_extraction --workers 4 --shard-pages 8
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from typing import List
+
+import fitz  # PyMuPDF
+
+from services.pdf_pool import PDFExtractionPool
+from services.pdf_service import validate_and_extract_head
+
+WORDS = [
+    "Python", "FastAPI", "research", "published", "distributed", "systems", "teaching",
+    "grant", "conference", "machine", "learning", "supervised", "students", "lecture",
+    "journal", "review", "project", "engineering", "analysis", "data"
+]
+
+
+def synthetic_cv(pages: int, lines_per_page: int = 45) -> bytes:
+    """A text-only PDF of `pages` full pages, like a long academic CV"""
+    rng = random.Random(pages)
+    doc = fitz.open()
+    for number in range(pages):
+        page = doc.new_page()
+        text = "\n".join(
+            " ".join(rng.choice(WORDS) for _ in range(12)) for _ in range(lines_per_page)
+        )
+        page.insert_textbox(fitz.Rect(40, 40, 570, 800), f"Page {number + 1}\n{text}", fontsize=9)
+    content = doc.tobytes()
+    doc.close()
+    return content
+
+
+def median_ms(samples: List[float]) -> float:
+    return round(statistics.median(samples) * 1000, 2)
+
+
+async def time_pool(pool: PDFExtractionPool, content: bytes, repeat: int, expected: str) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        text = await pool.extract_bytes(content)
+        samples.append(time.perf_counter() - started)
+        # Sharding must not change the text or its page order
+        if text != expected:
+            raise RuntimeError(f"{len(text)} chars extracted, expected {len(expected)}")
+    return median_ms(samples)
+
+
+async def run(page_counts: List[int], workers: int, shard_pages: int, repeat: int) -> dict:
+    pool = PDFExtractionPool(max_workers=workers, timeout=120)
+    sharded = PDFExtractionPool(max_workers=workers, timeout=120, shard_pages=shard_pages)
+
+    # Start the worker processes before timing anything
+    warm_up = synthetic_cv(1)
+    for target in (pool, sharded):
+        await asyncio.gather(*(target.extract_bytes(warm_up) for _ in range(workers)))
+
+    rows = []
+    for pages in page_counts:
+        content = synthetic_cv(pages)
+
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            text = validate_and_extract_head(content)[0].strip()
+            samples.append(time.perf_counter() - started)
+
+        row = {
+            "pages": pages,
+            "size_kb": round(len(content) / 1024, 1),
+            "chars": len(text),
+            "inline_ms": median_ms(samples),
+            "pool_ms": await time_pool(pool, content, repeat, text),
+            "sharded_ms": await time_pool(sharded, content, repeat, text)
+        }
+        row["sharded_speedup"] = round(row["pool_ms"] / row["sharded_ms"], 2) if row["sharded_ms"] else 0
+        rows.append(row)
+        print(json.dumps(row))
+
+    pool.shutdown()
+    sharded.shutdown()
+    return {"workers": workers, "shard_pages": shard_pages, "repeat": repeat, "results": rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", default="1,2,5,10,20,50,100,200", help="comma-separated page counts")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--shard-pages", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measurement (median reported)")
+    args = parser.parse_args()
+
+    page_counts = [int(count) for count in args.pages.split(",") if count]
+    report = asyncio.run(run(page_counts, args.workers, args.shard_pages, args.repeat))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""
+Local OpenAI-compatible stub of the Gemini endpoint, for load testing offline.
+
+It answers POST /chat/completions (plain and streamed) with JSON that is
+valid against the `response_format` schema the agent sends, so ResumeData,
+JobMatchData or any later output type parse without changes here. Latency
+and error injection are configurable.
+
+Run it, then point the app at it:
+
+    python -m benchmarks.stub_llm_server --port 9000 --latency-ms 800 --error-rate 0.02
+    BASE_URL=http://127.0.0.1:9000/v1 GEMINI_API_KEY=stub uvicorn main:app
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+class StubConfig:
+    """Behaviour knobs, set from the command line"""
+
+    def __init__(self):
+        # Total response time is lognormal: median * exp(sigma * N(0, 1)), capped
+        self.latency_ms = 800.0
+        self.latency_sigma = 0.35
+        self.max_latency_ms = 10000.0
+        # Share of the response time spent before the first streamed chunk
+        self.first_chunk_share = 0.3
+        self.chunk_chars = 24
+
+        self.error_rate = 0.0
+        # Share of answers with one list just outside its bounds (exercises output repair)
+        self.near_miss_rate = 0.0
+        self.error_statuses = [429, 503]
+        self.retry_after_seconds = 1
+
+
+config = StubConfig()
+counters = {"requests": 0, "streamed": 0, "errors": 0, "total_latency_ms": 0.0}
+
+app = FastAPI(title="HireSense stub LLM")
+
+
+# ============ FAKE CONTENT ============
+
+WORDS = {
+    "skills": [
+        "Python", "FastAPI", "SQL", "PostgreSQL", "Docker", "Kubernetes", "AWS", "React",
+        "TypeScript", "Machine Learning", "Pandas", "Redis", "GraphQL", "CI/CD", "Terraform",
+        "Go", "Java", "Spring Boot", "Kafka", "Linux"
+    ],
+    "title": ["Software Engineer", "Backend Developer", "Data Scientist", "DevOps Engineer", "Tech Lead"],
+    "company": ["Acme Corp", "Globex", "Initech", "Umbrella Labs", "Hooli", "Stark Industries"],
+    "education": ["BSc Computer Science", "MSc Data Science", "AWS Certified Developer", "BEng Software Engineering"],
+    "strengths": ["Strong Python background", "Production API experience", "Cloud deployment skills", "Database design"],
+    "recommendations": ["Build a project with the missing stack", "Earn a cloud certification", "Highlight measurable impact"],
+}
+WORDS["missing_skills"] = WORDS["skills"]
+
+SENTENCES = [
+    "Experienced engineer who ships reliable backend services.",
+    "Comfortable owning features from design to production.",
+    "Works well with product and data teams on measurable goals."
+]
+
+
+def resolve(schema: dict, defs: dict) -> dict:
+    ref = schema.get("$ref")
+    if ref:
+        return resolve(defs[ref.split("/")[-1]], defs)
+    if "anyOf" in schema:
+        # Prefer a concrete value over null
+        options = [option for option in schema["anyOf"] if option.get("type") != "null"]
+        return resolve(options[0] if options else schema["anyOf"][0], defs)
+    return schema
+
+
+def fake_string(name: str, index: int, rng: random.Random) -> str:
+    if name == "years":
+        start = rng.randint(2010, 2021)
+        return f"{start} - {start + rng.randint(1, 4)}"
+    if name == "summary":
+        return " ".join(rng.sample(SENTENCES, 2))
+    pool = WORDS.get(name)
+    if pool:
+        return pool[(index + rng.randrange(len(pool))) % len(pool)]
+    return rng.choice(SENTENCES)
+
+
+def fake_value(schema: dict, defs: dict, rng: random.Random, name: str = "", index: int = 0):
+    """Build a value that validates against a (strict) JSON schema node"""
+    schema = resolve(schema, defs)
+    kind = schema.get("type")
+
+    if kind == "object":
+        return {
+            key: fake_value(child, defs, rng, key)
+            for key, child in schema.get("properties", {}).items()
+        }
+    if kind == "array":
+        low = schema.get("minItems", 1)
+        high = schema.get("maxItems", max(low, 5))
+        count = rng.randint(low, max(low, min(high, low + 4)))
+        items = []
+        for i in range(count):
+            value = fake_value(schema.get("items", {}), defs, rng, name, i)
+            # Keep string lists free of duplicates, like a model would
+            if isinstance(value, str) and value in items:
+                value = f"{value} ({i + 1})"
+            items.append(value)
+        return items
+    if kind == "integer":
+        return rng.randint(int(schema.get("minimum", 0)), int(schema.get("maximum", 100)))
+    if kind == "number":
+        return round(rng.uniform(schema.get("minimum", 0), schema.get("maximum", 15)), 1)
+    if kind == "boolean":
+        return rng.random() < 0.5
+    if kind == "null":
+        return None
+    return fake_string(name, index, rng)
+
+
+def break_one_bound(value, schema: dict, defs: dict) -> bool:
+    """Push the first bounded list one item past its limit; True if one was found"""
+    schema = resolve(schema, defs)
+    if schema.get("type") == "object" and isinstance(value, dict):
+        return any(
+            break_one_bound(value[key], child, defs)
+            for key, child in schema.get("properties", {}).items() if key in value
+        )
+    if schema.get("type") == "array" and isinstance(value, list):
+        if schema.get("minItems") and ("maxItems" not in schema or random.random() < 0.5):
+            del value[schema["minItems"] - 1:]
+            return True
+        if "maxItems" in schema:
+            while len(value) <= schema["maxItems"]:
+                value.append(f"{value[-1] if value else 'item'} {len(value)}")
+            return True
+    return False
+
+
+def build_content(body: dict) -> str:
+    # Seeded by the prompt so the same input always gets the same answer
+    seed = hashlib.sha256(json.dumps(body.get("messages", []), sort_keys=True).encode()).hexdigest()
+    rng = random.Random(seed)
+
+    response_format = body.get("response_format") or {}
+    schema = (response_format.get("json_schema") or {}).get("schema")
+    if not schema:
+        return "OK"
+    value = fake_value(schema, schema.get("$defs", {}), rng)
+    if random.random() < config.near_miss_rate:
+        break_one_bound(value, schema, schema.get("$defs", {}))
+    return json.dumps(value)
+
+
+def count_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def sample_latency_seconds() -> float:
+    latency_ms = config.latency_ms * math.exp(config.latency_sigma * random.gauss(0, 1))
+    return min(latency_ms, config.max_latency_ms) / 1000
+
+
+# ============ ENDPOINTS ============
+
+def error_response() -> JSONResponse:
+    status_code = random.choice(config.error_statuses)
+    headers = {"retry-after": str(config.retry_after_seconds)} if status_code == 429 else {}
+    return JSONResponse(
+        status_code=status_code,
+        headers=headers,
+        content={"error": {"message": "Injected stub failure", "type": "stub_error", "code": status_code}}
+    )
+
+
+@app.post("/chat/completions")
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    counters["requests"] += 1
+    latency = sample_latency_seconds()
+    counters["total_latency_ms"] += latency * 1000
+
+    if random.random() < config.error_rate:
+        counters["errors"] += 1
+        await asyncio.sleep(latency * config.first_chunk_share)
+        return error_response()
+
+    model = body.get("model", "stub")
+    content = build_content(body)
+    prompt_tokens = count_tokens(json.dumps(body.get("messages", [])))
+    usage = {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": count_tokens(content),
+        "total_tokens": prompt_tokens + count_tokens(content)
+    }
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    created = int(time.time())
+
+    if not body.get("stream"):
+        await asyncio.sleep(latency)
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": usage
+        }
+
+    counters["streamed"] += 1
+    include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+
+    async def events():
+        chunks = [content[i:i + config.chunk_chars] for i in range(0, len(content), config.chunk_chars)]
+        await asyncio.sleep(latency * config.first_chunk_share)
+        gap = latency * (1 - config.first_chunk_share) / max(len(chunks), 1)
+
+        def chunk(delta: dict, finish_reason=None, **extra) -> str:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                **extra
+            }
+            return f"data: {json.dumps(payload)}\n\n"
+
+        yield chunk({"role": "assistant", "content": ""})
+        for piece in chunks:
+            yield chunk({"content": piece})
+            await asyncio.sleep(gap)
+        yield chunk({}, "stop")
+        if include_usage:
+            yield f"data: {json.dumps({'id': completion_id, 'object': 'chat.completion.chunk', 'created': created, 'model': model, 'choices': [], 'usage': usage})}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.get("/models")
+@app.get("/v1/models")
+async def list_models():
+    return {"object": "list", "data": [
+        {"id": "gemini-2.5-flash", "object": "model", "owned_by": "stub"},
+        {"id": "gemini-2.5-flash-lite", "object": "model", "owned_by": "stub"}
+    ]}
+
+
+@app.get("/stats")
+async def stats():
+    return {
+        **counters,
+        "avg_latency_ms": round(counters["total_latency_ms"] / counters["requests"], 2) if counters["requests"] else 0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-ms", type=float, default=config.latency_ms, help="median response time")
+    parser.add_argument("--latency-sigma", type=float, default=config.latency_sigma, help="lognormal spread (0 = fixed)")
+    parser.add_argument("--max-latency-ms", type=float, default=config.max_latency_ms)
+    parser.add_argument("--first-chunk-share", type=float, default=config.first_chunk_share)
+    parser.add_argument("--error-rate", type=float, default=config.error_rate, help="share of requests that fail")
+    parser.add_argument("--near-miss-rate", type=float, default=config.near_miss_rate,
+                        help="share of answers with one list just outside its schema bounds")
+    parser.add_argument("--error-statuses", default="429,503", help="comma-separated statuses to fail with")
+    args = parser.parse_args()
+
+    config.latency_ms = args.latency_ms
+    config.latency_sigma = args.latency_sigma
+    config.max_latency_ms = args.max_latency_ms
+    config.first_chunk_share = args.first_chunk_share
+    config.error_rate = args.error_rate
+    config.near_miss_rate = args.near_miss_rate
+    config.error_statuses = [int(code) for code in args.error_statuses.split(",") if code]
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
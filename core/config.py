@@ -14,6 +14,86 @@ class Settings(BaseSettings):
     gemini_api_key: str
     base_url: str
 
+    # Persistent resume analysis cache (LRU-evicted beyond this many entries)
+    resume_cache_max_entries: int = 5000
+
+    # In-memory job match cache
+    job_match_cache_ttl_seconds: int = 3600
+    job_match_cache_max_entries: int = 2000
+
+    # Batch job matching
+    batch_match_max_items: int = 50
+    batch_match_concurrency: int = 5
+
+    # Recruiter ranking: only the top-k pre-filtered candidates reach the LLM
+    ranking_max_top_k: int = 50
+
+    # Input token budgets per agent (prompt compaction)
+    resume_agent_token_budget: int = 6000
+    job_match_agent_token_budget: int = 4000
+
+    # Model tiering: inputs up to these sizes (tokens) try gemini-2.5-flash-lite first
+    model_tiering_enabled: bool = True
+    resume_lite_max_tokens: int = 1500
+    job_match_lite_max_tokens: int = 1200
+    combined_lite_max_tokens: int = 1500
+
+    # Uploaded resume files, stored once per distinct SHA-256
+    resume_blob_dir: str = "uploads/blobs"
+
+    # Bulk resume import (admin): files per import
+    bulk_import_max_files: int = 500
+
+    # PDF extraction process pool: worker processes, per-document timeout (seconds),
+    # documents per worker before it is replaced (0 = never), and the page count
+    # above which a document's pages are split across workers (0 = never split)
+    pdf_extract_workers: int = 2
+    pdf_extract_timeout_seconds: float = 30.0
+    pdf_extract_max_tasks_per_child: int = 50
+    pdf_extract_shard_pages: int = 8
+
+    # Durable task queue for resume analysis and job matching: concurrent tasks per
+    # worker, lease length and retry policy (seconds), how long finished and dead tasks are kept
+    task_queue_concurrency: int = 8
+    task_queue_visibility_timeout: float = 300.0
+    task_queue_max_attempts: int = 3
+    task_queue_retry_backoff: float = 10.0
+    task_queue_poll_interval: float = 1.0
+    task_queue_retention_hours: float = 24.0
+    task_queue_dead_retention_hours: float = 168.0
+    # Web processes consume the queue themselves unless analysis runs in `python worker.py`
+    task_queue_embedded_worker: bool = True
+
+    # WebSocket updates are relayed between processes through the database: how often web
+    # processes poll for them, and how long they are kept (seconds)
+    status_relay_enabled: bool = True
+    status_relay_poll_interval: float = 0.25
+    status_relay_retention_seconds: float = 300.0
+
+    # Near-miss agent outputs are repaired locally; lists may be padded by at most this many items
+    output_repair_max_pad: int = 1
+
+    # Process-wide limits for calls to the Gemini endpoint (0 disables a per-minute limit)
+    llm_max_in_flight: int = 16
+    llm_requests_per_minute: int = 300
+    llm_tokens_per_minute: int = 1000000
+
+    # Retries for transient Gemini errors (429/5xx/timeouts) and the circuit breaker
+    llm_retry_max_attempts: int = 4
+    llm_retry_base_delay: float = 1.0
+    llm_retry_max_delay: float = 20.0
+    llm_circuit_failure_threshold: int = 5
+    llm_circuit_reset_seconds: float = 30.0
+
+    # Shared keep-alive connection pool for the Gemini endpoint
+    llm_http_max_connections: int = 32
+    llm_http_max_keepalive_connections: int = 16
+    llm_http_keepalive_expiry: float = 120.0
+    llm_http_connect_timeout: float = 10.0
+    llm_http_read_timeout: float = 120.0
+    llm_http2: bool = True
+    llm_http_warmup_connections: int = 2
+
     class Config:
         env_file = BASE_DIR / ".env"
 
@@ -1,17 +1,43 @@
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from database import engine
 import models
 from routers import auth, user, resume, jobs, websocket, admin
 from fastapi.openapi.utils import get_openapi
+from core.config import settings
+from services.http_pool import llm_http_pool
+from services.pdf_pool import pdf_extraction_pool
+from services.task_queue import task_queue
+from services.status_relay import status_relay
 
 models.Base.metadata.create_all(bind=engine)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open LLM connections up front so the first analyses don't pay for TCP/TLS setup
+    await llm_http_pool.warm_up(settings.base_url, settings.llm_http_warmup_connections)
+    # Relay WebSocket updates from tasks that run in other processes
+    if settings.status_relay_enabled:
+        await status_relay.start()
+    # Requeue work a crash left unfinished, then start consuming the task queue
+    # (unless standalone workers run it: `python worker.py`)
+    if settings.task_queue_embedded_worker:
+        await task_queue.start()
+    yield
+    await task_queue.stop()
+    await status_relay.stop()
+    await llm_http_pool.aclose()
+    pdf_extraction_pool.shutdown()
+
+
 app = FastAPI(
     title="HireSense API",
     version="1.0.0",
-    description="AI-powered Resume Analyzer & Job Match Engine"
+    description="AI-powered Resume Analyzer & Job Match Engine",
+    lifespan=lifespan
 )
 
 # CORS Configuration
@@ -1,6 +1,6 @@
 from sqlalchemy import (
     Column, Integer, String, Text, DateTime,
-    Boolean, ForeignKey
+    Boolean, ForeignKey, Index
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.types import JSON
@@ -92,3 +92,62 @@ class JobMatch(Base):
     user = relationship("User", back_populates="job_matches")
     resume = relationship("Resume", back_populates="job_matches")
     job_description = relationship("JobDescription", back_populates="job_matches")
+
+
+class ResumeAnalysisCache(Base):
+    __tablename__ = "resume_analysis_cache"
+
+    # sha256(prompt version, model name, extracted text)
+    cache_key = Column(String, primary_key=True)
+    model_name = Column(String)
+    prompt_version = Column(String)
+
+    result = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_accessed_at = Column(DateTime, default=datetime.utcnow, index=True)
+    hit_count = Column(Integer, default=0)
+
+
+class QueuedTask(Base):
+    __tablename__ = "task_queue"
+    __table_args__ = (Index("ix_task_queue_status_available_at", "status", "available_at"),)
+
+    task_id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False, index=True)
+    payload = Column(JSON, nullable=False)
+
+    # queued → leased → done, or dead once out of attempts
+    status = Column(String, default="queued", nullable=False)
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    available_at = Column(DateTime, default=datetime.utcnow)
+    lease_owner = Column(String)
+    leased_until = Column(DateTime)
+    last_error = Column(Text)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime)
+
+
+class StatusEvent(Base):
+    __tablename__ = "status_events"
+
+    # WebSocket messages published by one process for the web process holding the user's socket
+    event_id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False)
+    origin = Column(String, nullable=False)
+    message = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class BulkImport(Base):
+    __tablename__ = "bulk_imports"
+
+    # An admin's bulk resume import; its progress is counted from the resumes' statuses
+    import_id = Column(String, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    resume_ids = Column(JSON, nullable=False)
+    rejected = Column(JSON, default=[])
+    created_at = Column(DateTime, default=datetime.utcnow)
+    # Set by whichever worker reports completion, so it is reported once
+    finished_at = Column(DateTime)
@@ -3,9 +3,18 @@ from fastapi import (
     HTTPException, 
     Depends, 
     status,
-    security
+    security,
+    Query,
+    UploadFile,
+    File
 )
-from typing import List
+import os
+import time
+import uuid
+import asyncio
+import zipfile
+from typing import List, Tuple
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from sqlalchemy import desc, func
 
@@ -14,6 +23,24 @@ import models
 from core.oauth2 import get_current_user
 from schemas import user_schema, resume_schema, job_schemas
 from fastapi import Security
+from core.config import settings
+from services.agent_service import AgentService, build_resume_data, model_tier_policy
+from services.scoring_service import CandidatePrefilter
+from services.cache_service import resume_analysis_cache, job_match_cache
+from services.prompt_service import prompt_compactor
+from services.singleflight import resume_analysis_flight, job_match_flight, resume_and_job_match_flight
+from services.rate_limiter import llm_rate_limiter
+from services.resilience import llm_retry_policy
+from services.http_pool import llm_http_pool
+from services.llm_metrics import llm_call_metrics
+from services.output_repair import output_repairer
+from services.pdf_service import PDFService
+from services.pdf_pool import pdf_extraction_pool
+from services.blob_store import blob_store
+from services.task_queue import task_queue
+from services.status_relay import status_relay
+from services.websocket_manager import send_bulk_import_status
+from routers.resume import UPLOAD_DIR, copy_analysis, report_bulk_import_progress
 
 
 router = APIRouter(tags=["Admin"])
@@ -26,6 +53,70 @@ def admin_required(current_user: models.User = Depends(get_current_user)):
         )
     return current_user
 
+# ============ HELPER FUNCTIONS ============
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+async def stream_upload_to_disk(upload: UploadFile, file_path: str, max_bytes: int) -> bool:
+    """Copy an upload to disk chunk by chunk; False (and no file) if it exceeds max_bytes"""
+    written = 0
+    # Disk writes go to the threadpool so a large import doesn't stall the event loop
+    buffer = await run_in_threadpool(open, file_path, "wb")
+    try:
+        while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+            written += len(chunk)
+            if written > max_bytes:
+                break
+            await run_in_threadpool(buffer.write, chunk)
+    finally:
+        await run_in_threadpool(buffer.close)
+    
+    if written > max_bytes:
+        await run_in_threadpool(os.remove, file_path)
+        return False
+    return True
+
+def unpack_zip_pdfs(zip_path: str, name_prefix: str, max_files: int) -> Tuple[List[Tuple[str, str]], List[dict]]:
+    """
+    Copy the PDFs out of a zip into the upload directory
+    
+    Returns ([(filename, file_path)], [rejection]). Member sizes are capped
+    while copying, so a zip that lies about its sizes can't fill the disk.
+    """
+    saved, rejected = [], []
+    try:
+        with zipfile.ZipFile(zip_path) as archive:
+            for info in archive.infolist():
+                filename = os.path.basename(info.filename)
+                if info.is_dir() or not filename or info.filename.startswith("__MACOSX/"):
+                    continue
+                if not filename.lower().endswith(".pdf"):
+                    rejected.append({"filename": info.filename, "error": "Only PDF files are allowed"})
+                    continue
+                if len(saved) >= max_files:
+                    rejected.append({"filename": info.filename, "error": "Import file limit reached"})
+                    continue
+                if info.file_size > PDFService.MAX_FILE_SIZE:
+                    rejected.append({"filename": info.filename, "error": "File exceeds 10MB limit"})
+                    continue
+                
+                file_path = os.path.join(UPLOAD_DIR, f"{name_prefix}_{len(saved)}_{filename.replace(' ', '_')}")
+                with archive.open(info) as source, open(file_path, "wb") as target:
+                    copied = 0
+                    while chunk := source.read(UPLOAD_CHUNK_SIZE):
+                        copied += len(chunk)
+                        if copied > PDFService.MAX_FILE_SIZE:
+                            break
+                        target.write(chunk)
+                if copied > PDFService.MAX_FILE_SIZE:
+                    os.remove(file_path)
+                    rejected.append({"filename": info.filename, "error": "File exceeds 10MB limit"})
+                    continue
+                saved.append((filename, file_path))
+    except zipfile.BadZipFile:
+        rejected.append({"filename": os.path.basename(zip_path), "error": "Invalid zip archive"})
+    return saved, rejected
+
+# ============ API ENDPOINTS ============
 @router.get("/users", response_model=List[user_schema.UserResponse], status_code=status.HTTP_200_OK)
 async def get_all_users(skip: int = 0, limit: int = 100,
                         db: Session = Depends(get_db),
@@ -93,4 +184,286 @@ async def get_admin_stats(
         "active_resumes": active_resumes,
         "resume_status_breakdown": status_breakdown,
         "average_matches_per_user": round(float(avg_matches_per_user), 2)
-    }
\ No newline at end of file
+    }
+
+
+@router.post("/rank", response_model=job_schemas.RankResumesResponse, status_code=status.HTTP_200_OK)
+async def rank_resumes(
+    rank_request: job_schemas.RankResumesRequest,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(admin_required)
+):
+    """
+    Admin: Rank analyzed resumes against one job description
+    
+    1. Every analyzed resume is scored locally from its skills/experience JSON
+    2. Only the top_k candidates are sent to the Job Matcher Agent
+    3. Shortlisted candidates are returned ordered by AI fit score
+    """
+    if rank_request.top_k > settings.ranking_max_top_k:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"top_k can be at most {settings.ranking_max_top_k}"
+        )
+    
+    started = time.perf_counter()
+    
+    # Stage 1: local pre-filter over the structured columns only
+    query = db.query(
+        models.Resume.resume_id,
+        models.Resume.user_id,
+        models.Resume.filename,
+        models.Resume.skills,
+        models.Resume.experience,
+        models.Resume.education,
+        models.Resume.summary
+    ).filter(models.Resume.status == "analyzed")
+    
+    if rank_request.active_only:
+        query = query.filter(models.Resume.is_active == True)
+    
+    candidates = [row._asdict() for row in query.all()]
+    ranked = CandidatePrefilter(rank_request.job_description).rank(candidates)
+    shortlist = ranked[:rank_request.top_k]
+    
+    prefilter_ms = (time.perf_counter() - started) * 1000
+    
+    # Stage 2: full AI match for the shortlist only (bounded concurrency)
+    semaphore = asyncio.Semaphore(settings.batch_match_concurrency)
+    agent_service = AgentService()
+    
+    async def match_candidate(candidate: dict) -> dict:
+        result = {
+            "resume_id": candidate["resume_id"],
+            "user_id": candidate["user_id"],
+            "filename": candidate["filename"],
+            "prefilter_score": candidate["prefilter_score"],
+            "matched_skills": candidate["matched_skills"],
+            "fit_score": None
+        }
+        resume_data = build_resume_data(
+            candidate["skills"], candidate["experience"], candidate["education"], candidate["summary"]
+        )
+        async with semaphore:
+            try:
+                match_result = await agent_service.analyze_job_fit(
+                    job_description=rank_request.job_description,
+                    resume_data=resume_data,
+                    use_cache=rank_request.use_cache
+                )
+            except Exception as e:
+                print(f"❌ Ranking match failed for resume {candidate['resume_id']}: {e}")
+                result["error"] = str(e)
+                return result
+        
+        result.update(match_result.model_dump())
+        return result
+    
+    ranking = await asyncio.gather(*(match_candidate(candidate) for candidate in shortlist))
+    ranking.sort(key=lambda item: (item["fit_score"] is None, -(item["fit_score"] or 0), -item["prefilter_score"]))
+    
+    return {
+        "total_candidates": len(candidates),
+        "shortlisted": len(shortlist),
+        "prefilter_ms": round(prefilter_ms, 2),
+        "total_ms": round((time.perf_counter() - started) * 1000, 2),
+        "ranking": ranking
+    }
+
+
+@router.post("/resumes/import", response_model=resume_schema.BulkImportResponse, status_code=status.HTTP_202_ACCEPTED)
+async def bulk_import_resumes(
+    files: List[UploadFile] = File(..., description="PDF resumes and/or zip archives of PDFs"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(admin_required)
+):
+    """
+    Admin: Import many resumes at once (e.g. for a hiring campaign)
+    
+    - Accepts any mix of PDF files and zip archives of PDFs
+    - Uploads are streamed to disk; zips are unpacked off the event loop
+    - Imported resumes belong to the admin and are not active
+    - Files seen before reuse their text and analysis; every other resume
+      gets a resume_analysis task
+    - Connect to the WebSocket for bulk_import_update progress messages,
+      sent by whichever worker finishes each resume
+    """
+    import_id = uuid.uuid4().hex
+    name_prefix = f"{current_user.user_id}_import_{import_id[:12]}"
+    saved: List[Tuple[str, str]] = []
+    rejected: List[dict] = []
+    
+    for index, upload in enumerate(files):
+        filename = os.path.basename(upload.filename or f"upload_{index}")
+        remaining = settings.bulk_import_max_files - len(saved)
+        
+        if filename.lower().endswith(".zip"):
+            zip_path = os.path.join(UPLOAD_DIR, f"{name_prefix}_{index}.zip")
+            # A zip of PDFs may hold up to `remaining` 10MB files
+            if not await stream_upload_to_disk(upload, zip_path, max(remaining, 1) * PDFService.MAX_FILE_SIZE):
+                rejected.append({"filename": filename, "error": "Zip archive is too large"})
+                continue
+            members, member_rejections = await run_in_threadpool(
+                unpack_zip_pdfs, zip_path, f"{name_prefix}_{index}", remaining
+            )
+            await run_in_threadpool(os.remove, zip_path)
+            saved.extend(members)
+            rejected.extend(member_rejections)
+        elif filename.lower().endswith(".pdf"):
+            if remaining <= 0:
+                rejected.append({"filename": filename, "error": "Import file limit reached"})
+                continue
+            file_path = os.path.join(UPLOAD_DIR, f"{name_prefix}_{index}_{filename.replace(' ', '_')}")
+            if not await stream_upload_to_disk(upload, file_path, PDFService.MAX_FILE_SIZE):
+                rejected.append({"filename": filename, "error": "File exceeds 10MB limit"})
+                continue
+            saved.append((filename, file_path))
+        else:
+            rejected.append({"filename": filename, "error": "Only PDF and zip files are allowed"})
+    
+    if not saved:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"message": "No importable PDF files found", "rejected": rejected}
+        )
+    
+    # Resumes point at content-addressed blobs; identical files collapse to one
+    hashes = await asyncio.gather(*(
+        run_in_threadpool(blob_store.hash_file, file_path) for _, file_path in saved
+    ))
+    
+    # Files seen before (in earlier uploads or imports) reuse their text and analysis
+    sources = {
+        sha256: blob_store.find_extracted(db, blob_store.path_for(sha256))
+        for sha256 in set(hashes)
+    }
+    
+    # Create all database records with one commit
+    resumes = []
+    for (filename, _), sha256 in zip(saved, hashes):
+        resume = models.Resume(
+            user_id=current_user.user_id,
+            filename=filename,
+            file_path=blob_store.path_for(sha256),
+            status="uploaded",
+            is_active=False
+        )
+        if sources[sha256]:
+            copy_analysis(resume, sources[sha256])
+        resumes.append(resume)
+    db.add_all(resumes)
+    db.flush()
+    db.add(models.BulkImport(
+        import_id=import_id,
+        user_id=current_user.user_id,
+        resume_ids=[resume.resume_id for resume in resumes],
+        rejected=rejected
+    ))
+    db.commit()
+    
+    # Store the files once the rows reference them, so a concurrent delete can't drop a blob
+    for (_, file_path), sha256 in zip(saved, hashes):
+        await run_in_threadpool(blob_store.commit, file_path, sha256)
+    
+    pending = [resume for resume in resumes if resume.status != "analyzed"]
+    task_queue.enqueue_many(db, "resume_analysis", [
+        {
+            "resume_id": resume.resume_id,
+            "file_path": resume.file_path,
+            "user_id": current_user.user_id,
+            "import_id": import_id
+        }
+        for resume in pending
+    ])
+    
+    await send_bulk_import_status(
+        user_id=current_user.user_id,
+        import_id=import_id,
+        status="queued",
+        message=f"{len(resumes)} resumes received, {len(pending)} queued for analysis...",
+        completed=len(resumes) - len(pending),
+        total=len(resumes),
+        data={
+            "resume_ids": [resume.resume_id for resume in pending],
+            "rejected": rejected
+        }
+    )
+    if not pending:
+        # Every file was seen before, so the import is already done
+        await report_bulk_import_progress(db, import_id)
+    
+    return {
+        "import_id": import_id,
+        "message": "Bulk import started. Connect to WebSocket for real-time updates.",
+        "total": len(resumes),
+        "resume_ids": [resume.resume_id for resume in resumes],
+        "rejected": rejected,
+        "status": "processing"
+    }
+
+
+@router.get("/performance", status_code=status.HTTP_200_OK)
+async def get_performance_stats(
+    current_user: models.User = Depends(admin_required)
+):
+    """Admin: Get caching and AI pipeline performance counters"""
+    return {
+        "resume_analysis_cache": resume_analysis_cache.stats(),
+        "job_match_cache": job_match_cache.stats(),
+        "prompt_compaction": prompt_compactor.stats(),
+        "request_coalescing": {
+            "resume_analysis": resume_analysis_flight.stats(),
+            "job_match": job_match_flight.stats(),
+            "resume_and_job_match": resume_and_job_match_flight.stats()
+        },
+        "model_tiering": model_tier_policy.stats(),
+        "llm_rate_limiter": llm_rate_limiter.stats(),
+        "llm_retries": llm_retry_policy.stats(),
+        "llm_http_pool": llm_http_pool.stats(),
+        "llm_calls": llm_call_metrics.stats(),
+        "output_repair": output_repairer.stats(),
+        "pdf_extraction": pdf_extraction_pool.stats(),
+        "resume_blobs": blob_store.stats(),
+        "status_relay": status_relay.stats()
+    }
+
+
+@router.get("/llm-calls", status_code=status.HTTP_200_OK)
+async def get_llm_calls(
+    agent: str = Query(None, description="Only calls of this agent, e.g. job_match"),
+    model: str = Query(None, description="Only calls to this model"),
+    outcome: str = Query(None, description="Only calls with this outcome, e.g. invalid_output"),
+    min_wall_ms: float = Query(0, ge=0, description="Only calls at least this slow"),
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: models.User = Depends(admin_required)
+):
+    """Admin: Per-agent/model latency histograms, token usage and cost, plus the most recent LLM calls"""
+    return {
+        "summary": llm_call_metrics.stats(),
+        "calls": llm_call_metrics.recent(agent, model, outcome, min_wall_ms, limit)
+    }
+
+
+@router.get("/queue", status_code=status.HTTP_200_OK)
+async def get_task_queue(
+    dead_limit: int = Query(20, ge=0, le=500, description="How many dead-lettered tasks to list"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(admin_required)
+):
+    """Admin: Task queue depth and task ages by kind, plus recently dead-lettered tasks"""
+    return task_queue.stats(db, dead_limit)
+
+
+@router.post("/queue/{task_id}/retry", status_code=status.HTTP_200_OK)
+async def retry_dead_task(
+    task_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(admin_required)
+):
+    """Admin: Requeue a dead-lettered task with a fresh set of attempts"""
+    if not task_queue.requeue_dead(db, task_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No dead-lettered task with ID {task_id}"
+        )
+    return {"task_id": task_id, "status": "queued"}
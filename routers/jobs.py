@@ -1,17 +1,16 @@
 import json
+import uuid
+import asyncio
 from typing import List, Optional
 from datetime import datetime
-import asyncio 
 
 from fastapi import (
     APIRouter, 
     HTTPException, 
     Depends, 
     status,
-    BackgroundTasks,
     Query
 )
-from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from sqlalchemy import desc, func
 
@@ -19,14 +18,83 @@ from database import get_db, SessionLocal
 import models
 from schemas import job_schemas as schemas
 from core.oauth2 import get_current_user
-from services.agent_service import AgentService 
-from schemas.agent_schemas import ResumeData, JobMatchData, Experience, Position
-from services.websocket_manager import send_job_match_status
+from core.config import settings
+from services.agent_service import AgentService, build_resume_data
+from services.scoring_service import local_fit_scorer
+from services.resilience import CircuitOpenError
+from services.pdf_pool import pdf_extraction_pool
+from services.task_queue import task_queue, will_retry
+from services.partial_json import PartialCallback, RESET
+from schemas.agent_schemas import ResumeData, JobMatchData, ResumeJobMatchData
+from services.websocket_manager import send_job_match_status, send_batch_match_status, send_resume_status
+from routers.resume import update_unanalyzed_resume
 
 router = APIRouter(tags=["Jobs"])
 
 # ============ HELPER FUNCTIONS ============
-def process_job_match(
+async def get_resume_text(resume: models.Resume) -> str:
+    """The resume's extracted text, extracting it now if the upload task hasn't yet"""
+    if resume.text_extracted:
+        return resume.text_extracted
+    try:
+        return await pdf_extraction_pool.extract_file(resume.file_path)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to extract text from PDF: {str(e)}"
+        )
+
+async def match_unanalyzed_resume(
+    db: Session,
+    resume: models.Resume,
+    extracted_text: str,
+    job_description: str,
+    use_cache: bool = True,
+    on_partial: PartialCallback = None
+) -> JobMatchData:
+    """
+    Analyze the resume and match it against the JD in one AI call
+    
+    The resume analysis is saved as a side effect, so the resume is
+    "analyzed" afterwards and later matches take the normal path. If the
+    queued upload analysis saved its result first, that one is kept.
+    """
+    agent_service = AgentService()
+    combined: ResumeJobMatchData = await agent_service.analyze_resume_and_job_fit(
+        extracted_text=extracted_text,
+        job_description=job_description,
+        use_cache=use_cache,
+        on_partial=on_partial
+    )
+    
+    if not update_unanalyzed_resume(db, resume.resume_id, {
+        "text_extracted": extracted_text,
+        "skills": combined.resume.skills,
+        "experience": combined.resume.experience.model_dump(),
+        "education": combined.resume.education,
+        "summary": combined.resume.summary,
+        "status": "analyzed"
+    }):
+        return combined.match
+    db.refresh(resume)
+    
+    await send_resume_status(
+        user_id=resume.user_id,
+        resume_id=resume.resume_id,
+        status="analyzed",
+        message="Resume analysis completed successfully! ✅",
+        progress=100,
+        data={
+            "skills_count": len(combined.resume.skills),
+            "experience_years": combined.resume.experience.total_years,
+            "education_count": len(combined.resume.education)
+        }
+    )
+    print(f"✅ Resume {resume.resume_id} analyzed together with its first job match")
+    
+    return combined.match
+
+async def process_job_match(
     resume_id: int, 
     job_id: int, 
     job_description: str,
@@ -34,18 +102,18 @@ def process_job_match(
     resume_experience: dict,
     resume_education: List[str],
     resume_summary: str,
-    user_id: int  # ADDED user_id parameter
+    user_id: int,  # ADDED user_id parameter
+    use_cache: bool = True
 ):
     """
     Background task: Run AI job matching agent
     WITH WEBSOCKET UPDATES
+
+    Runs from the task queue and awaits the agent directly. A resume that
+    isn't analyzed yet is analyzed and matched in one combined AI call.
     """
     db_bg = SessionLocal()
     
-    # Create event loop for async operations
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    
     try:
         # Get resume and job from database
         resume = db_bg.query(models.Resume).filter(
@@ -60,67 +128,91 @@ def process_job_match(
             print(f"❌ Resume {resume_id} or Job {job_id} not found")
             return
         
+        # A retried task whose earlier attempt saved the match has nothing left to do
+        if db_bg.query(models.JobMatch).filter(
+            models.JobMatch.resume_id == resume_id,
+            models.JobMatch.job_id == job_id
+        ).first():
+            return
+        
         # Send initial status
-        loop.run_until_complete(send_job_match_status(
+        await send_job_match_status(
             user_id=user_id,
             job_id=job_id,
             resume_id=resume_id,
             status="preparing",
             message="Preparing job match analysis...",
             progress=20
-        ))
+        )
         
-        # Parse experience properly
-        try:
-            if isinstance(resume_experience, dict):
-                experience = Experience(
-                    total_years=resume_experience.get("total_years", 0),
-                    positions=[
-                        Position(**pos) if isinstance(pos, dict) else pos
-                        for pos in resume_experience.get("positions", [])
-                    ]
-                )
-            else:
-                experience = Experience(total_years=0, positions=[])
-        except Exception as e:
-            print(f"⚠️ Error parsing experience: {e}")
-            experience = Experience(total_years=0, positions=[])
+        analyzed = resume.status == "analyzed"
+        resume_text = resume.text_extracted if analyzed else await get_resume_text(resume)
         
-        # Prepare ResumeData object for agent
-        resume_data = ResumeData(
-            skills=resume_skills or [],
-            experience=experience,
-            education=resume_education or [],
-            summary=resume_summary or ""
+        # Instant local score as a first answer while the AI runs
+        provisional = local_fit_scorer.score(
+            job_description, resume_skills, resume_text
         )
         
         # Send analyzing status
-        loop.run_until_complete(send_job_match_status(
+        await send_job_match_status(
             user_id=user_id,
             job_id=job_id,
             resume_id=resume_id,
             status="analyzing",
             message="AI is analyzing job fit...",
-            progress=50
-        ))
+            progress=50,
+            data={"provisional": provisional.model_dump()}
+        )
         
         # Run AI Agent 2 (Job Matcher)
         print(f"🤖 Starting AI job matching for resume {resume_id}, job {job_id}")
-        agent_service = AgentService()
-        match_result: JobMatchData = agent_service.analyze_job_fit_with_agent(
-            job_description=job_description,
-            resume_data=resume_data
-        )
+        # Stream each result field to the client as soon as the agent produces it
+        completed_fields = set()
+        expected_fields = len(JobMatchData.model_fields if analyzed else ResumeJobMatchData.model_fields)
+        
+        async def push_partial(event):
+            kind, field, value, index = event
+            if kind == RESET:
+                completed_fields.clear()
+            elif kind == "field":
+                completed_fields.add(field)
+            await send_job_match_status(
+                user_id=user_id,
+                job_id=job_id,
+                resume_id=resume_id,
+                status="analyzing",
+                message="Re-running analysis..." if kind == RESET else f"Scored {field}",
+                progress=50 + 40 * min(len(completed_fields), expected_fields) // expected_fields,
+                data={"partial": {"kind": kind, "field": field, "value": value, "index": index}}
+            )
+        
+        if analyzed:
+            # Prepare ResumeData object for agent
+            resume_data = build_resume_data(
+                resume_skills, resume_experience, resume_education, resume_summary
+            )
+            
+            agent_service = AgentService()
+            match_result: JobMatchData = await agent_service.analyze_job_fit(
+                job_description=job_description,
+                resume_data=resume_data,
+                use_cache=use_cache,
+                on_partial=push_partial
+            )
+        else:
+            match_result = await match_unanalyzed_resume(
+                db_bg, resume, resume_text, job_description, use_cache, push_partial
+            )
         
         # Send saving status
-        loop.run_until_complete(send_job_match_status(
+        await send_job_match_status(
             user_id=user_id,
             job_id=job_id,
             resume_id=resume_id,
             status="saving",
             message="Saving match results...",
             progress=90
-        ))
+        )
         
         # Save match results
         job_match = models.JobMatch(
@@ -137,7 +229,7 @@ def process_job_match(
         db_bg.refresh(job_match)
         
         # Send final success status
-        loop.run_until_complete(send_job_match_status(
+        await send_job_match_status(
             user_id=user_id,
             job_id=job_id,
             resume_id=resume_id,
@@ -150,30 +242,214 @@ def process_job_match(
                 "strengths_count": len(match_result.strengths),
                 "missing_skills_count": len(match_result.missing_skills)
             }
-        ))
+        )
         
         print(f"✅ Job match completed successfully")
         print(f"   Fit Score: {match_result.fit_score}")
         print(f"   Match ID: {job_match.match_id}")
         
     except Exception as e:
-        # Send error status
-        loop.run_until_complete(send_job_match_status(
+        # Transient AI failures go back to the queue for another attempt
+        retrying = will_retry(e)
+        await send_job_match_status(
             user_id=user_id,
             job_id=job_id,
             resume_id=resume_id,
-            status="failed",
-            message=f"Job matching failed: {str(e)}",
+            status="queued" if retrying else "failed",
+            message=f"Job matching failed: {str(e)}" + (", retrying shortly..." if retrying else ""),
             progress=0,
-            data={"error": str(e)}
-        ))
+            data={"error": str(e), "retrying": retrying}
+        )
         
         print(f"❌ Error in job matching: {str(e)}")
         import traceback
         traceback.print_exc()
+        raise
     finally:
         db_bg.close()
-        loop.close()
+
+task_queue.register("job_match", process_job_match)
+
+async def process_batch_job_match(
+    batch_id: str,
+    resume_id: int,
+    jobs: List[dict],
+    resume_skills: List[str],
+    resume_experience: dict,
+    resume_education: List[str],
+    resume_summary: str,
+    user_id: int,
+    use_cache: bool = True
+):
+    """
+    Background task: Match one resume against many job descriptions
+    
+    At most `batch_match_concurrency` agent calls are in flight at once.
+    Every item reports its own progress over the WebSocket, and all
+    successful JobMatch rows are saved with a single commit at the end.
+    """
+    db_bg = SessionLocal()
+    total = len(jobs)
+    completed = 0
+    semaphore = asyncio.Semaphore(settings.batch_match_concurrency)
+    agent_service = AgentService()
+    
+    resume_data = build_resume_data(
+        resume_skills, resume_experience, resume_education, resume_summary
+    )
+    
+    async def match_one(job: dict):
+        nonlocal completed
+        async with semaphore:
+            await send_job_match_status(
+                user_id=user_id,
+                job_id=job["job_id"],
+                resume_id=resume_id,
+                status="analyzing",
+                message="AI is analyzing job fit...",
+                progress=50,
+                data={"batch_id": batch_id}
+            )
+            try:
+                match_result: JobMatchData = await agent_service.analyze_job_fit(
+                    job_description=job["job_description"],
+                    resume_data=resume_data,
+                    use_cache=use_cache
+                )
+            except Exception as e:
+                completed += 1
+                await send_job_match_status(
+                    user_id=user_id,
+                    job_id=job["job_id"],
+                    resume_id=resume_id,
+                    status="failed",
+                    message=f"Job matching failed: {str(e)}",
+                    progress=0,
+                    data={"batch_id": batch_id, "error": str(e)}
+                )
+                await send_batch_match_status(
+                    user_id=user_id,
+                    batch_id=batch_id,
+                    resume_id=resume_id,
+                    status="processing",
+                    message=f"{completed}/{total} jobs processed",
+                    completed=completed,
+                    total=total
+                )
+                return job["job_id"], None, str(e)
+            
+            completed += 1
+            await send_job_match_status(
+                user_id=user_id,
+                job_id=job["job_id"],
+                resume_id=resume_id,
+                status="saving",
+                message="Match ready, waiting for batch to finish...",
+                progress=90,
+                data={"batch_id": batch_id, "fit_score": match_result.fit_score}
+            )
+            await send_batch_match_status(
+                user_id=user_id,
+                batch_id=batch_id,
+                resume_id=resume_id,
+                status="processing",
+                message=f"{completed}/{total} jobs processed",
+                completed=completed,
+                total=total
+            )
+            return job["job_id"], match_result, None
+    
+    try:
+        await send_batch_match_status(
+            user_id=user_id,
+            batch_id=batch_id,
+            resume_id=resume_id,
+            status="processing",
+            message=f"Matching resume against {total} jobs...",
+            completed=0,
+            total=total
+        )
+        
+        print(f"🤖 Starting batch job matching {batch_id}: resume {resume_id}, {total} jobs")
+        outcomes = await asyncio.gather(*(match_one(job) for job in jobs))
+        
+        # Save all match results with one commit
+        job_matches = [
+            models.JobMatch(
+                user_id=user_id,
+                resume_id=resume_id,
+                job_id=job_id,
+                fit_score=match_result.fit_score,
+                strengths=match_result.strengths,
+                missing_skills=match_result.missing_skills,
+                recommendations="\n".join(match_result.recommendations)
+            )
+            for job_id, match_result, _ in outcomes
+            if match_result is not None
+        ]
+        db_bg.add_all(job_matches)
+        db_bg.flush()
+        saved = [
+            {"job_id": job_match.job_id, "match_id": job_match.match_id, "fit_score": job_match.fit_score}
+            for job_match in job_matches
+        ]
+        db_bg.commit()
+        
+        for item in saved:
+            await send_job_match_status(
+                user_id=user_id,
+                job_id=item["job_id"],
+                resume_id=resume_id,
+                status="completed",
+                message="Job match analysis completed! ✅",
+                progress=100,
+                data={"batch_id": batch_id, **item}
+            )
+        
+        failed = [
+            {"job_id": job_id, "error": error}
+            for job_id, match_result, error in outcomes
+            if match_result is None
+        ]
+        await send_batch_match_status(
+            user_id=user_id,
+            batch_id=batch_id,
+            resume_id=resume_id,
+            status="completed",
+            message=f"Batch matching completed: {len(saved)} matched, {len(failed)} failed ✅",
+            completed=total,
+            total=total,
+            data={
+                "matches": sorted(saved, key=lambda item: item["fit_score"], reverse=True),
+                "failed": failed
+            }
+        )
+        
+        print(f"✅ Batch {batch_id} completed: {len(saved)} matched, {len(failed)} failed")
+        
+    except Exception as e:
+        db_bg.rollback()
+        # Nothing was saved, so another attempt re-runs the whole batch
+        retrying = will_retry(e)
+        await send_batch_match_status(
+            user_id=user_id,
+            batch_id=batch_id,
+            resume_id=resume_id,
+            status="queued" if retrying else "failed",
+            message=f"Batch matching failed: {str(e)}" + (", retrying shortly..." if retrying else ""),
+            completed=completed,
+            total=total,
+            data={"error": str(e), "retrying": retrying}
+        )
+        
+        print(f"❌ Error in batch job matching: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise
+    finally:
+        db_bg.close()
+
+task_queue.register("batch_job_match", process_batch_job_match)
 
 # ============ API ENDPOINTS ============
 
@@ -182,7 +458,6 @@ def process_job_match(
              status_code=status.HTTP_202_ACCEPTED)
 async def match_job(
     match_request: schemas.MatchJobRequest,
-    background_tasks: BackgroundTasks,
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -192,6 +467,7 @@ async def match_job(
     - If resume_id is provided, use that resume
     - Otherwise, use user's active resume
     - Triggers AI matching in background
+    - A resume that isn't analyzed yet is analyzed in the same AI call
     - Connect to WebSocket for real-time progress
     """
     # Determine which resume to use
@@ -220,13 +496,6 @@ async def match_job(
                 detail="No active resume found. Please upload a resume first."
             )
     
-    # Check if resume is analyzed
-    if resume.status != "analyzed":
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Resume is not analyzed yet. Current status: {resume.status}"
-        )
-    
     # Save job description
     job_desc = models.JobDescription(
         user_id=current_user.user_id,
@@ -247,18 +516,18 @@ async def match_job(
         progress=10
     )
     
-    # Start background matching task with user_id
-    background_tasks.add_task(
-        process_job_match,
-        resume.resume_id,
-        job_desc.job_id,
-        match_request.job_description,
-        resume.skills,
-        resume.experience,
-        resume.education,
-        resume.summary,
-        current_user.user_id  # ADDED this parameter
-    )
+    # Queue the matching task with user_id
+    task_queue.enqueue(db, "job_match", {
+        "resume_id": resume.resume_id,
+        "job_id": job_desc.job_id,
+        "job_description": match_request.job_description,
+        "resume_skills": resume.skills,
+        "resume_experience": resume.experience,
+        "resume_education": resume.education,
+        "resume_summary": resume.summary,
+        "user_id": current_user.user_id,
+        "use_cache": match_request.use_cache
+    })
     
     return {
         "message": "Job matching started. Results will be available shortly. Connect to WebSocket for real-time updates.",
@@ -267,6 +536,129 @@ async def match_job(
         "status": "processing"
     }
 
+@router.post("/match/batch",
+             response_model=schemas.BatchMatchStatusResponse,
+             status_code=status.HTTP_202_ACCEPTED)
+async def match_jobs_batch(
+    batch_request: schemas.BatchMatchRequest,
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Match one resume against many job descriptions in a single request
+    
+    - Accepts new job descriptions and/or saved job_ids
+    - Jobs are matched concurrently (bounded) by a task queue worker
+    - Each job reports job_match_update messages, the batch reports batch_match_update
+    - All match results are saved together when the batch finishes
+    """
+    total = len(batch_request.jobs) + len(batch_request.job_ids)
+    if total == 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide at least one job description or job_id"
+        )
+    
+    if total > settings.batch_match_max_items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch can contain at most {settings.batch_match_max_items} jobs"
+        )
+    
+    # Determine which resume to use
+    if batch_request.resume_id:
+        resume = db.query(models.Resume).filter(
+            models.Resume.resume_id == batch_request.resume_id,
+            models.Resume.user_id == current_user.user_id
+        ).first()
+        
+        if not resume:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Resume with ID {batch_request.resume_id} not found"
+            )
+    else:
+        resume = db.query(models.Resume).filter(
+            models.Resume.user_id == current_user.user_id,
+            models.Resume.is_active == True
+        ).first()
+        
+        if not resume:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No active resume found. Please upload a resume first."
+            )
+    
+    if resume.status != "analyzed":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Resume is not analyzed yet. Current status: {resume.status}"
+        )
+    
+    # Load saved job descriptions
+    saved_jobs = []
+    if batch_request.job_ids:
+        saved_jobs = db.query(models.JobDescription).filter(
+            models.JobDescription.job_id.in_(batch_request.job_ids),
+            models.JobDescription.user_id == current_user.user_id
+        ).all()
+        
+        missing_ids = set(batch_request.job_ids) - {job.job_id for job in saved_jobs}
+        if missing_ids:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Job descriptions not found: {sorted(missing_ids)}"
+            )
+    
+    # Save new job descriptions
+    new_jobs = [
+        models.JobDescription(
+            user_id=current_user.user_id,
+            title=item.title,
+            description=item.job_description
+        )
+        for item in batch_request.jobs
+    ]
+    db.add_all(new_jobs)
+    db.commit()
+    
+    jobs = [
+        {"job_id": job.job_id, "job_description": job.description}
+        for job in saved_jobs + new_jobs
+    ]
+    batch_id = uuid.uuid4().hex
+    
+    await send_batch_match_status(
+        user_id=current_user.user_id,
+        batch_id=batch_id,
+        resume_id=resume.resume_id,
+        status="queued",
+        message=f"Batch of {len(jobs)} jobs received, starting analysis...",
+        completed=0,
+        total=len(jobs)
+    )
+    
+    task_queue.enqueue(db, "batch_job_match", {
+        "batch_id": batch_id,
+        "resume_id": resume.resume_id,
+        "jobs": jobs,
+        "resume_skills": resume.skills,
+        "resume_experience": resume.experience,
+        "resume_education": resume.education,
+        "resume_summary": resume.summary,
+        "user_id": current_user.user_id,
+        "use_cache": batch_request.use_cache
+    })
+    
+    return {
+        "message": "Batch matching started. Connect to WebSocket for real-time updates.",
+        "batch_id": batch_id,
+        "resume_id": resume.resume_id,
+        "job_ids": [job["job_id"] for job in jobs],
+        "total": len(jobs),
+        "status": "processing"
+    }
+
 @router.get("/matches", response_model=List[schemas.JobMatchResponse])
 async def get_my_matches(
     current_user: models.User = Depends(get_current_user),
@@ -338,6 +730,11 @@ async def quick_match(
     """
     Quick match - returns immediate results without saving to database
     (Good for testing or quick comparisons)
+    
+    - refine=false: returns only the instant local score (skill overlap + BM25)
+    - refine=true: returns the AI result, with the local score under "provisional"
+    - A resume that isn't analyzed yet is analyzed and matched in one AI call
+      (pipeline "combined"), and the analysis is saved to the resume
     """
     # Get resume (active or specified)
     if match_request.resume_id:
@@ -357,48 +754,44 @@ async def quick_match(
             detail="No resume found"
         )
     
-    if resume.status != "analyzed":
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Resume is not analyzed yet. Status: {resume.status}"
-        )
+    analyzed = resume.status == "analyzed"
+    resume_text = resume.text_extracted if analyzed else await get_resume_text(resume)
     
-    # Parse experience properly
-    try:
-        if isinstance(resume.experience, dict):
-            experience = Experience(
-                total_years=resume.experience.get("total_years", 0),
-                positions=[
-                    Position(**pos) if isinstance(pos, dict) else pos
-                    for pos in resume.experience.get("positions", [])
-                ]
-            )
-        else:
-            experience = Experience(total_years=0, positions=[])
-    except Exception as e:
-        print(f"⚠️ Error parsing experience: {e}")
-        experience = Experience(total_years=0, positions=[])
-    
-    # Prepare resume data
-    resume_data = ResumeData(
-        skills=resume.skills or [],
-        experience=experience,
-        education=resume.education or [],
-        summary=resume.summary or ""
+    # Stage 1: instant local score (no AI round trip)
+    provisional = local_fit_scorer.score(
+        match_request.job_description, resume.skills, resume_text
     )
     
-    # Run agent synchronously (for quick response)
+    if not match_request.refine:
+        return {
+            "fit_score": provisional.fit_score,
+            "strengths": provisional.strengths,
+            "missing_skills": provisional.missing_skills,
+            "recommendations": [],
+            "instant_match": True,
+            "source": "local",
+            "provisional": provisional.model_dump(),
+            "resume_id": resume.resume_id
+        }
+    
+    # Stage 2: AI refinement, awaited directly on the event loop
     try:
-        agent_service = AgentService()
-        match_result: JobMatchData = await run_in_threadpool(
-        agent_service.analyze_job_fit_with_agent,
-        match_request.job_description,
-        resume_data
-        )
-        # match_result: JobMatchData = agent_service.analyze_job_fit_with_agent(
-        #     job_description=match_request.job_description,
-        #     resume_data=resume_data
-        # )
+        if analyzed:
+            # Prepare resume data
+            resume_data = build_resume_data(
+                resume.skills, resume.experience, resume.education, resume.summary
+            )
+            
+            agent_service = AgentService()
+            match_result: JobMatchData = await agent_service.analyze_job_fit(
+                job_description=match_request.job_description,
+                resume_data=resume_data,
+                use_cache=match_request.use_cache
+            )
+        else:
+            match_result = await match_unanalyzed_resume(
+                db, resume, resume_text, match_request.job_description, match_request.use_cache
+            )
         
         return {
             "fit_score": match_result.fit_score,
@@ -406,9 +799,18 @@ async def quick_match(
             "missing_skills": match_result.missing_skills,
             "recommendations": match_result.recommendations,
             "instant_match": True,
+            "source": "ai",
+            "pipeline": "match" if analyzed else "combined",
+            "provisional": provisional.model_dump(),
             "resume_id": resume.resume_id
         }
         
+    except CircuitOpenError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(int(e.retry_in) + 1)}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
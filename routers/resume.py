@@ -1,17 +1,15 @@
 import os
 from datetime import datetime
 from typing import List
-import asyncio 
 
 from fastapi import (
     APIRouter, 
-    UploadFile, 
-    File, 
     HTTPException, 
     Depends, 
     status,
-    BackgroundTasks
+    Request
 )
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from database import get_db, SessionLocal
@@ -19,9 +17,14 @@ import models
 from schemas import resume_schema as schemas
 from core.oauth2 import get_current_user
 from services.pdf_service import PDFService
+from services.pdf_pool import pdf_extraction_pool
+from services.upload_service import PDFUploadStream
+from services.blob_store import blob_store
+from services.task_queue import task_queue, will_retry
 from services.agent_service import AgentService
 from schemas.agent_schemas import ResumeData
-from services.websocket_manager import send_resume_status
+from services.partial_json import RESET
+from services.websocket_manager import send_resume_status, send_bulk_import_status
 
 router = APIRouter(tags=["Resume"])
 
@@ -29,27 +32,114 @@ UPLOAD_DIR = "uploads/resumes"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 # ============ HELPER FUNCTIONS ============
-def save_uploaded_file(file_content: bytes, user_id: int, original_filename: str) -> str:
-    """Save uploaded file with unique name"""
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    unique_filename = f"{user_id}_{timestamp}_{original_filename.replace(' ', '_')}"
-    file_path = os.path.join(UPLOAD_DIR, unique_filename)
+def copy_analysis(resume: models.Resume, source: models.Resume):
+    """Give a resume the extracted text (and analysis, if any) of an identical file"""
+    resume.text_extracted = source.text_extracted
+    if source.status == "analyzed":
+        resume.skills = source.skills
+        resume.experience = source.experience
+        resume.education = source.education
+        resume.summary = source.summary
+        resume.status = "analyzed"
+
+def update_unanalyzed_resume(db: Session, resume_id: int, values: dict) -> bool:
+    """
+    Update a resume only while it isn't analyzed. The queued analysis and a
+    job match's combined analysis can both be working on a new resume; once
+    one has saved its result, the other must not overwrite or fail it.
+    Returns False if the resume is already analyzed (or gone).
+    """
+    updated = db.query(models.Resume).filter(
+        models.Resume.resume_id == resume_id,
+        models.Resume.status != "analyzed"
+    ).update(values, synchronize_session=False)
+    db.commit()
+    return bool(updated)
+
+async def report_bulk_import_progress(db: Session, import_id: str, resume_id: int = None, error: str = None):
+    """
+    Send bulk_import_update progress for an import, counted from its resumes'
+    statuses so every worker reports the same totals. With `resume_id`, the
+    update is about that resume, and is skipped while it will still be retried.
+    The import's completion is claimed with a conditional UPDATE, so exactly
+    one worker announces it.
+    """
+    bulk_import = db.get(models.BulkImport, import_id)
+    if not bulk_import:
+        return
+    rows = {
+        row.resume_id: row
+        for row in db.query(models.Resume.resume_id, models.Resume.filename, models.Resume.status).filter(
+            models.Resume.resume_id.in_(bulk_import.resume_ids)
+        )
+    }
+    if resume_id is not None and resume_id in rows and rows[resume_id].status not in ("analyzed", "failed"):
+        return
+    
+    total = len(bulk_import.resume_ids)
+    # Resumes deleted mid-import count as done
+    completed = total - sum(row.status not in ("analyzed", "failed") for row in rows.values())
+    failed = [
+        {"resume_id": row.resume_id, "filename": row.filename}
+        for row in rows.values() if row.status == "failed"
+    ]
     
-    with open(file_path, "wb") as buffer:
-        buffer.write(file_content)
+    if resume_id is not None:
+        await send_bulk_import_status(
+            user_id=bulk_import.user_id,
+            import_id=import_id,
+            status="processing",
+            message=f"{completed}/{total} resumes processed",
+            completed=completed,
+            total=total,
+            data={
+                "resume_id": resume_id,
+                "filename": rows[resume_id].filename if resume_id in rows else None,
+                "succeeded": completed - len(failed),
+                "failed": len(failed),
+                **({"error": error} if error else {})
+            }
+        )
     
-    return file_path
+    if completed < total:
+        return
+    claimed = db.query(models.BulkImport).filter(
+        models.BulkImport.import_id == import_id,
+        models.BulkImport.finished_at.is_(None)
+    ).update({models.BulkImport.finished_at: datetime.utcnow()}, synchronize_session=False)
+    db.commit()
+    if claimed:
+        await send_bulk_import_status(
+            user_id=bulk_import.user_id,
+            import_id=import_id,
+            status="completed",
+            message=f"Bulk import completed: {total - len(failed)} analyzed, {len(failed)} failed ✅",
+            completed=total,
+            total=total,
+            data={"failed": failed, "rejected": bulk_import.rejected or []}
+        )
+        print(f"✅ Bulk import {import_id} completed: {total - len(failed)} analyzed, {len(failed)} failed")
 
-def process_resume_with_agent(resume_id: int, file_path: str, user_id: int):  # ADDED user_id parameter
+async def process_resume_with_agent(
+    resume_id: int,
+    file_path: str,
+    user_id: int,
+    extracted_text: str = None,
+    import_id: str = None
+):
     """
     Background task: Extract text → AI analysis → Store structured data
     WITH WEBSOCKET UPDATES
+
+    Runs from the task queue. Uploads store the text extracted while
+    validating, so the archived file is only read back (in the extraction
+    pool) when the resume has no text yet. A resume a job match already
+    analyzed is skipped, and is never overwritten or marked failed.
+    Resumes of a bulk import also report the import's progress.
     """
     db_bg = SessionLocal()
-    
-    # Create event loop for async operations
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
+    resume = None
+    error = None
     
     try:
         resume = db_bg.query(models.Resume).filter(
@@ -58,65 +148,93 @@ def process_resume_with_agent(resume_id: int, file_path: str, user_id: int):  #
         
         if not resume:
             return
+        if resume.status == "analyzed":
+            print(f"⏭️ Resume {resume_id} already analyzed, skipping")
+            return
         
-        # Step 1: Extract text from PDF
-        loop.run_until_complete(send_resume_status(
-            user_id=user_id,
-            resume_id=resume_id,
-            status="extracting",
-            message="Extracting text from PDF...",
-            progress=25
-        ))
-        
-        resume.status = "extracting"
-        db_bg.commit()
-        
-        extracted_text = PDFService.extract_text_from_pdf(file_path)
+        # Step 1: Extract text from PDF (skipped when the upload already did)
+        if extracted_text is None:
+            extracted_text = resume.text_extracted
+        if extracted_text is None:
+            await send_resume_status(
+                user_id=user_id,
+                resume_id=resume_id,
+                status="extracting",
+                message="Extracting text from PDF...",
+                progress=25
+            )
+            
+            if not update_unanalyzed_resume(db_bg, resume_id, {"status": "extracting"}):
+                return
+            
+            extracted_text = await pdf_extraction_pool.extract_file(file_path)
         
-        loop.run_until_complete(send_resume_status(
+        await send_resume_status(
             user_id=user_id,
             resume_id=resume_id,
             status="extracting",
             message="Text extracted successfully",
             progress=50,
             data={"text_length": len(extracted_text)}
-        ))
+        )
         
         # Step 2: Run AI Agent 1 (Resume Analysis)
-        loop.run_until_complete(send_resume_status(
+        await send_resume_status(
             user_id=user_id,
             resume_id=resume_id,
             status="analyzing",
             message="AI is analyzing your resume...",
             progress=60
-        ))
+        )
+        
+        if not update_unanalyzed_resume(db_bg, resume_id, {"status": "analyzing"}):
+            return
         
-        resume.status = "analyzing"
-        db_bg.commit()
+        # Stream each extracted field to the client as soon as the agent produces it
+        completed_fields = set()
+        
+        async def push_partial(event):
+            kind, field, value, index = event
+            if kind == RESET:
+                completed_fields.clear()
+            elif kind == "field":
+                completed_fields.add(field)
+            await send_resume_status(
+                user_id=user_id,
+                resume_id=resume_id,
+                status="analyzing",
+                message="Re-running analysis..." if kind == RESET else f"Extracted {field}",
+                progress=60 + 30 * len(completed_fields) // len(ResumeData.model_fields),
+                data={"partial": {"kind": kind, "field": field, "value": value, "index": index}}
+            )
         
         agent_service = AgentService()
-        resume_data: ResumeData = agent_service.analyze_resume_with_agent(extracted_text)
+        resume_data: ResumeData = await agent_service.analyze_resume(
+            extracted_text, on_partial=push_partial
+        )
         
-        loop.run_until_complete(send_resume_status(
+        await send_resume_status(
             user_id=user_id,
             resume_id=resume_id,
             status="analyzing",
             message="Analysis complete, saving results...",
             progress=90
-        ))
-        
-        # Step 3: Store AI results in database
-        resume.text_extracted = extracted_text
-        resume.skills = resume_data.skills
-        resume.experience = resume_data.experience.model_dump()
-        resume.education = resume_data.education
-        resume.summary = resume_data.summary
-        resume.status = "analyzed"
+        )
         
-        db_bg.commit()
+        # Step 3: Store AI results in database, unless a job match got there first
+        if not update_unanalyzed_resume(db_bg, resume_id, {
+            "text_extracted": extracted_text,
+            "skills": resume_data.skills,
+            "experience": resume_data.experience.model_dump(),
+            "education": resume_data.education,
+            "summary": resume_data.summary,
+            "status": "analyzed"
+        }):
+            print(f"⏭️ Resume {resume_id} was analyzed by a job match meanwhile, result discarded")
+            return
         
         # Send final success message
-        loop.run_until_complete(send_resume_status(
+        await send_resume_status(
             user_id=user_id,
             resume_id=resume_id,
             status="analyzed",
@@ -127,42 +245,113 @@ def process_resume_with_agent(resume_id: int, file_path: str, user_id: int):  #
                 "experience_years": resume_data.experience.total_years,
                 "education_count": len(resume_data.education)
             }
-        ))
+        )
         
         print(f"✅ Resume {resume_id} analyzed successfully")
         
     except Exception as e:
+        # Transient AI failures go back to the queue for another attempt
+        retrying = will_retry(e)
         if resume:
-            resume.status = "failed"
-            db_bg.commit()
+            db_bg.rollback()
+            if not update_unanalyzed_resume(db_bg, resume_id, {"status": "queued" if retrying else "failed"}):
+                # A job match saved an analysis meanwhile; nothing left to retry
+                print(f"⏭️ Resume {resume_id} was analyzed by a job match meanwhile: {str(e)}")
+                return
         
         # Send error message via WebSocket
-        loop.run_until_complete(send_resume_status(
+        await send_resume_status(
             user_id=user_id,
             resume_id=resume_id,
-            status="failed",
-            message=f"Analysis failed: {str(e)}",
+            status="queued" if retrying else "failed",
+            message=f"Analysis failed: {str(e)}" + (", retrying shortly..." if retrying else ""),
             progress=0,
-            data={"error": str(e)}
-        ))
+            data={"error": str(e), "retrying": retrying}
+        )
         
         print(f"❌ Error processing resume {resume_id}: {str(e)}")
         import traceback
         traceback.print_exc()
+        error = str(e)
+        raise
     finally:
+        if import_id:
+            try:
+                await report_bulk_import_progress(db_bg, import_id, resume_id, error)
+            except Exception as e:
+                db_bg.rollback()
+                print(f"⚠️ Could not report progress of bulk import {import_id}: {e}")
         db_bg.close()
-        loop.close()
+
+def find_unfinished_resumes(db: Session) -> List[dict]:
+    """Resumes a crash left mid-analysis, as resume_analysis task payloads"""
+    resumes = db.query(models.Resume).filter(
+        models.Resume.status.in_(["uploaded", "extracting", "analyzing", "queued"])
+    ).all()
+    return [
+        {"resume_id": resume.resume_id, "file_path": resume.file_path, "user_id": resume.user_id}
+        for resume in resumes
+    ]
+
+task_queue.register("resume_analysis", process_resume_with_agent, recover=find_unfinished_resumes)
+
+# The upload body is parsed as it streams in (see PDFUploadStream), so the
+# multipart form is documented here rather than declared as a File() parameter
+UPLOAD_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {
+                        "file": {"type": "string", "format": "binary", "description": "PDF resume file"}
+                    }
+                }
+            }
+        }
+    }
+}
 
 # ============ API ENDPOINTS ============
-@router.post("/upload", response_model=schemas.UploadResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/upload",
+    response_model=schemas.UploadResponse,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra=UPLOAD_REQUEST_BODY
+)
 async def upload_resume(
-    background_tasks: BackgroundTasks,
-    file: UploadFile = File(..., description="PDF resume file"),
+    request: Request,
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Upload a resume PDF for AI analysis with real-time WebSocket updates"""
-    # Check for existing active resume
+    # Stream the file to disk, refusing it as soon as it is too large or not a PDF
+    upload = await PDFUploadStream(
+        field_name="file",
+        path_for=lambda filename: blob_store.temp_path(),
+        max_bytes=PDFService.MAX_FILE_SIZE
+    ).receive(request)
+    
+    # An identical file uploaded before already has its text (and usually its analysis)
+    file_path = blob_store.path_for(upload.sha256)
+    source = blob_store.find_extracted(db, file_path)
+    
+    if source:
+        extracted_text = source.text_extracted
+    else:
+        # Validate PDF and extract its text from memory in a single open, in the extraction pool
+        try:
+            extracted_text = await pdf_extraction_pool.extract_bytes(upload.content)
+        except ValueError as e:
+            await run_in_threadpool(os.remove, upload.file_path)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+    
+    # Replace the existing active resume only once the new one is valid
     existing_resume = db.query(models.Resume).filter(
         models.Resume.user_id == current_user.user_id,
         models.Resume.is_active == True
@@ -172,45 +361,41 @@ async def upload_resume(
         existing_resume.is_active = False
         db.commit()
     
-    # Validate file type
-    if not file.filename.lower().endswith('.pdf'):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Only PDF files are allowed"
-        )
-    
-    # Read and save file
-    try:
-        content = await file.read()
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Failed to read file: {str(e)}"
-        )
-    
-    file_path = save_uploaded_file(content, current_user.user_id, file.filename)
-    
-    # Validate PDF
-    is_valid, error_msg = PDFService.validate_pdf(file_path)
-    if not is_valid:
-        os.remove(file_path)
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=error_msg
-        )
-    
     # Create database record
     db_resume = models.Resume(
         user_id=current_user.user_id,
-        filename=file.filename,
+        filename=upload.filename,
         file_path=file_path,
+        text_extracted=extracted_text,
         status="uploaded",
         is_active=True
     )
+    if source:
+        copy_analysis(db_resume, source)
     db.add(db_resume)
     db.commit()
     db.refresh(db_resume)
     
+    # Store the file once the row references it, so a concurrent delete can't drop the blob
+    await run_in_threadpool(blob_store.commit, upload.file_path, upload.sha256)
+    
+    if db_resume.status == "analyzed":
+        await send_resume_status(
+            user_id=current_user.user_id,
+            resume_id=db_resume.resume_id,
+            status="analyzed",
+            message="Resume analysis completed successfully! ✅",
+            progress=100,
+            data={"duplicate_of": source.resume_id}
+        )
+        return {
+            "resume_id": db_resume.resume_id,
+            "filename": db_resume.filename,
+            "message": "Identical resume already analyzed; results reused.",
+            "status": "analyzed",
+            "sha256": upload.sha256
+        }
+    
     # Send initial WebSocket notification
     await send_resume_status(
         user_id=current_user.user_id,
@@ -220,19 +405,19 @@ async def upload_resume(
         progress=10
     )
     
-    # Start background processing with user_id
-    background_tasks.add_task(
-        process_resume_with_agent,
-        db_resume.resume_id,
-        file_path,
-        current_user.user_id  # ADDED this parameter
-    )
+    # Queue the analysis; the worker reads the extracted text from the resume
+    task_queue.enqueue(db, "resume_analysis", {
+        "resume_id": db_resume.resume_id,
+        "file_path": file_path,
+        "user_id": current_user.user_id
+    })
     
     return {
         "resume_id": db_resume.resume_id,
         "filename": db_resume.filename,
         "message": "Resume uploaded. AI analysis in progress. Connect to WebSocket for real-time updates.",
-        "status": "processing"
+        "status": "processing",
+        "sha256": upload.sha256
     }      
 
 @router.get("/my-resume", response_model=schemas.ResumeResponse)
@@ -337,16 +522,14 @@ def delete_resume(
             detail=f"Resume with id {resume_id} not found"
         )
     
-    # Delete the file from filesystem
-    if resume.file_path and os.path.exists(resume.file_path):
-        try:
-            os.remove(resume.file_path)
-        except Exception as e:
-            print(f"Warning: Could not delete file {resume.file_path}: {str(e)}")
-    
+    file_path = resume.file_path
     resume_query.delete(synchronize_session=False)
     db.commit()
     
+    # Delete the file from filesystem once no other resume shares it
+    if file_path:
+        blob_store.release(db, file_path)
+    
     return None
 
 @router.put("/{resume_id}/{is_active}", status_code=status.HTTP_200_OK)
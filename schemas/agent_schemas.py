@@ -31,4 +31,8 @@ class JobMatchData(BaseModel):
     )
     recommendations: Annotated[List[str], Field(min_length=2, max_length=3)] = Field(
         ..., description="2-3 actionable recommendations."
-    )
\ No newline at end of file
+    )
+
+class ResumeJobMatchData(BaseModel):
+    resume: ResumeData = Field(..., description="Structured data extracted from the resume.")
+    match: JobMatchData = Field(..., description="Assessment of the resume against the job description.")
@@ -21,6 +21,35 @@ class MatchJobRequest(BaseModel):
     job_description: str = Field(..., description="Job description to match against")
     title: Optional[str] = Field(None, description="Job title (optional)")
     resume_id: Optional[int] = Field(None, description="Resume ID to use (defaults to active resume)")
+    use_cache: bool = Field(True, description="Set to false to bypass the match cache and re-run the AI")
+    refine: bool = Field(True, description="Quick match only: set to false to return just the instant local score")
+
+class BatchJobItem(BaseModel):
+    job_description: str = Field(..., description="Job description to match against")
+    title: Optional[str] = Field(None, description="Job title (optional)")
+
+class BatchMatchRequest(BaseModel):
+    jobs: List[BatchJobItem] = Field(default_factory=list, description="New job descriptions to match")
+    job_ids: List[int] = Field(default_factory=list, description="Saved job description IDs to match")
+    resume_id: Optional[int] = Field(None, description="Resume ID to use (defaults to active resume)")
+    use_cache: bool = Field(True, description="Set to false to bypass the match cache and re-run the AI")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "jobs": [
+                    {"title": "Backend Engineer", "job_description": "Python, FastAPI, PostgreSQL..."},
+                    {"title": "Data Engineer", "job_description": "Spark, Airflow, SQL..."}
+                ],
+                "job_ids": [12, 15]
+            }
+        }
+
+class RankResumesRequest(BaseModel):
+    job_description: str = Field(..., description="Job description to rank candidates against")
+    top_k: int = Field(10, ge=1, description="How many pre-filtered candidates get a full AI match")
+    active_only: bool = Field(True, description="Only rank each user's active resume")
+    use_cache: bool = Field(True, description="Set to false to bypass the match cache and re-run the AI")
 
 # Response schemas
 class JobDescriptionResponse(BaseModel):
@@ -61,4 +90,40 @@ class MatchStatusResponse(BaseModel):
     message: str
     job_id: int
     resume_id: int
-    status: str
\ No newline at end of file
+    status: str
+
+class BatchMatchStatusResponse(BaseModel):
+    message: str
+    batch_id: str
+    resume_id: int
+    job_ids: List[int]
+    total: int
+    status: str
+
+class RankedCandidate(BaseModel):
+    resume_id: int
+    user_id: int
+    filename: Optional[str]
+    prefilter_score: float
+    matched_skills: List[str]
+    fit_score: Optional[int]
+    strengths: List[str] = []
+    missing_skills: List[str] = []
+    recommendations: List[str] = []
+    error: Optional[str] = None
+
+class RankResumesResponse(BaseModel):
+    total_candidates: int
+    shortlisted: int
+    prefilter_ms: float
+    total_ms: float
+    ranking: List[RankedCandidate]
+
+class ProvisionalMatch(BaseModel):
+    """Instant, locally computed match (no AI involved)"""
+    fit_score: int
+    strengths: List[str]
+    missing_skills: List[str]
+    skill_overlap: Optional[float]
+    text_relevance: float
+    elapsed_ms: float
@@ -32,3 +32,18 @@ class UploadResponse(BaseModel):
     filename: str
     message: str
     status: str
+    sha256: Optional[str] = None
+
+
+class BulkImportRejection(BaseModel):
+    filename: str
+    error: str
+
+
+class BulkImportResponse(BaseModel):
+    import_id: str
+    message: str
+    total: int
+    resume_ids: List[int]
+    rejected: List[BulkImportRejection]
+    status: str
@@ -1,6 +1,15 @@
-from agents import Runner, set_tracing_disabled, Agent, AsyncOpenAI, OpenAIChatCompletionsModel
+from typing import List
+
+from agents import Runner, set_tracing_disabled, Agent, AsyncOpenAI, ModelSettings, OpenAIChatCompletionsModel
 from core import config
 from schemas import agent_schemas
+from services.cache_service import resume_analysis_cache, job_match_cache, make_job_match_key, hash_key, normalize_text
+from services.prompt_service import prompt_compactor
+from services.singleflight import resume_analysis_flight, job_match_flight, resume_and_job_match_flight
+from services.model_tiering import ModelTierPolicy, LITE, FULL
+from services.partial_json import PartialCallback
+from services.http_pool import llm_http_pool
+from services.output_repair import RepairingOutputSchema
 
 set_tracing_disabled(True)
 
@@ -15,7 +24,13 @@ def get_gemini_client():
     if _gemini_client is None:
         gemini_api_key = config.settings.gemini_api_key
         gemini_base_url = config.settings.base_url
-        _gemini_client = AsyncOpenAI(api_key=gemini_api_key, base_url=gemini_base_url)
+        # Retries are handled by services.resilience, so the SDK's own are turned off
+        _gemini_client = AsyncOpenAI(
+            api_key=gemini_api_key,
+            base_url=gemini_base_url,
+            max_retries=0,
+            http_client=llm_http_pool.client
+        )
     return _gemini_client
 
 def get_gemini_model1():
@@ -38,13 +53,10 @@ def get_gemini_model2():
         )
     return _gemini_model2
 
-class AgentService:
-    def analyze_resume_with_agent(self, extracted_text: str) -> agent_schemas.ResumeData:
-        print("analyze_resume_with_agent called")
-        resume_analysis_agent = Agent(
-            name="Resume Analysis Agent",
-            model=get_gemini_model1(),  # Use lazy getter
-            instructions="""
+# Bump whenever the instructions change so cached results from older prompts are not reused
+RESUME_PROMPT_VERSION = "v1"
+
+RESUME_ANALYSIS_INSTRUCTIONS = """
                 You are an expert **Data Extraction Agent** specializing in parsing professional documents like resumes, CVs, and biography snippets.
 
         Your core mission is to analyze the provided text content, which contains information about a person's professional background, and strictly extract the following four pieces of information:
@@ -61,22 +73,11 @@ class AgentService:
         * **Summary:** Generate a concise professional summary of the person, strictly limited to **2 to 3 sentences**. The summary must be synthesized from the provided text.
 
         Your output **must strictly adhere** to the provided JSON Schema for reliable programmatic parsing. Do not include any conversational filler, explanation, or markdown formatting other than the required JSON object.
-                """,
-            output_type=agent_schemas.ResumeData,
-        )
+                """
 
-        res = Runner.run_sync(
-            starting_agent=resume_analysis_agent,
-            input=extracted_text,
-        )
-        return res.final_output
-
-    def analyze_job_fit_with_agent(self, job_description: str, resume_data: agent_schemas.ResumeData) -> agent_schemas.JobMatchData:
-        print("analyze_job_fit_with_agent called")
-        job_matcher_agent = Agent(
-            name="Job Matcher Agent",
-            model=get_gemini_model1(),  # Use lazy getter
-            instructions="""
+JOB_MATCH_PROMPT_VERSION = "v1"
+
+JOB_MATCHER_INSTRUCTIONS = """
                 You are an expert **Job Matcher and Assessment Agent**. Your task is to analyze a job description (JD) and a candidate's structured resume data to determine the fitness of the candidate for the role.
 
                 ### Input Data:
@@ -90,16 +91,217 @@ class AgentService:
                 * **Recommendations:** Provide 2 to 3 concise, actionable suggestions for the candidate to close the identified gaps or improve their profile alignment with the JD.
 
                 Your output **must strictly adhere** to the provided JSON Schema (JobMatchData) for reliable programmatic parsing. Do not include any conversational filler or explanation.
-            """,
-            output_type=agent_schemas.JobMatchData,
-        )
-        
-        # Prepare input properly
-        candidate_data_json = resume_data.model_dump_json(indent=2)
+            """
 
-        res2 = Runner.run_sync(
-            starting_agent=job_matcher_agent,
-            input=f'"job_description": {job_description},\n"candidate_data": {candidate_data_json}',
-        )
+COMBINED_PROMPT_VERSION = "v1"
+
+COMBINED_INSTRUCTIONS = f"""
+                You handle a resume and a job description in a single pass, in two steps.
+
+                ### Input Data:
+                1. **Job Description (JD):** A block of unstructured text outlining the role requirements.
+                2. **Resume Text:** The raw text extracted from the candidate's resume.
+
+                ### Step 1 - resume
+                {RESUME_ANALYSIS_INSTRUCTIONS}
+
+                ### Step 2 - match
+                Using the candidate data you extracted in step 1 as the Candidate Data:
+                {JOB_MATCHER_INSTRUCTIONS}
+
+                Return both results in one object: `resume` (ResumeData) first, then `match` (JobMatchData).
+            """
+
+# Generic advice used to top up recommendations that came back one short of their minimum.
+# Labelled, because it is stored and shown with the match. Strengths and missing skills
+# are claims about the candidate and are never padded: a short list fails and escalates.
+PADDED_PREFIX = "General tip (not specific to this match): "
+OUTPUT_PADDING = {
+    "recommendations": [
+        f"{PADDED_PREFIX}Tailor the resume to the key requirements in the job description",
+        f"{PADDED_PREFIX}Quantify achievements with measurable results"
+    ]
+}
+
+# Built once: near-miss outputs are repaired locally instead of failing validation
+RESUME_OUTPUT_SCHEMA = RepairingOutputSchema(agent_schemas.ResumeData, padding=OUTPUT_PADDING)
+JOB_MATCH_OUTPUT_SCHEMA = RepairingOutputSchema(agent_schemas.JobMatchData, padding=OUTPUT_PADDING)
+COMBINED_OUTPUT_SCHEMA = RepairingOutputSchema(agent_schemas.ResumeJobMatchData, padding=OUTPUT_PADDING)
+
+# Runs are streamed, and the SDK only asks for usage in streams sent to api.openai.com;
+# without it every call would be recorded with zero tokens and zero cost
+AGENT_MODEL_SETTINGS = ModelSettings(include_usage=True)
+
+
+def build_resume_analysis_agent(model: OpenAIChatCompletionsModel = None) -> Agent:
+    """Build the Resume Analysis Agent (Agent 1)"""
+    return Agent(
+        name="Resume Analysis Agent",
+        model=model or get_gemini_model1(),  # Use lazy getter
+        instructions=RESUME_ANALYSIS_INSTRUCTIONS,
+        output_type=RESUME_OUTPUT_SCHEMA,
+        model_settings=AGENT_MODEL_SETTINGS,
+    )
+
+
+def build_job_matcher_agent(model: OpenAIChatCompletionsModel = None) -> Agent:
+    """Build the Job Matcher Agent (Agent 2)"""
+    return Agent(
+        name="Job Matcher Agent",
+        model=model or get_gemini_model1(),  # Use lazy getter
+        instructions=JOB_MATCHER_INSTRUCTIONS,
+        output_type=JOB_MATCH_OUTPUT_SCHEMA,
+        model_settings=AGENT_MODEL_SETTINGS,
+    )
+
+
+def build_combined_agent(model: OpenAIChatCompletionsModel = None) -> Agent:
+    """Build the Resume + Job Match Agent (Agents 1 and 2 in one call)"""
+    return Agent(
+        name="Resume and Job Match Agent",
+        model=model or get_gemini_model1(),  # Use lazy getter
+        instructions=COMBINED_INSTRUCTIONS,
+        output_type=COMBINED_OUTPUT_SCHEMA,
+        model_settings=AGENT_MODEL_SETTINGS,
+    )
+
+
+def build_resume_data(
+    resume_skills: List[str],
+    resume_experience: dict,
+    resume_education: List[str],
+    resume_summary: str
+) -> agent_schemas.ResumeData:
+    """Rebuild the agent's ResumeData from the JSON columns stored on a Resume"""
+    # Parse experience properly
+    try:
+        if isinstance(resume_experience, dict):
+            experience = agent_schemas.Experience(
+                total_years=resume_experience.get("total_years", 0),
+                positions=[
+                    agent_schemas.Position(**pos) if isinstance(pos, dict) else pos
+                    for pos in resume_experience.get("positions", [])
+                ]
+            )
+        else:
+            experience = agent_schemas.Experience(total_years=0, positions=[])
+    except Exception as e:
+        print(f"⚠️ Error parsing experience: {e}")
+        experience = agent_schemas.Experience(total_years=0, positions=[])
+    
+    return agent_schemas.ResumeData(
+        skills=resume_skills or [],
+        experience=experience,
+        education=resume_education or [],
+        summary=resume_summary or ""
+    )
+
+
+def build_job_match_input(job_description: str, resume_data: agent_schemas.ResumeData) -> str:
+    """Prepare the Job Matcher Agent input properly (compacted, within the token budget)"""
+    return prompt_compactor.compact_job_match_input(job_description, resume_data)
+
+
+# Short/simple inputs try flash-lite first and escalate to flash when needed
+model_tier_policy = ModelTierPolicy(
+    models={LITE: get_gemini_model2, FULL: get_gemini_model1},
+    lite_max_tokens={
+        "resume_analysis": config.settings.resume_lite_max_tokens,
+        "job_match": config.settings.job_match_lite_max_tokens,
+        "resume_and_job_match": config.settings.combined_lite_max_tokens
+    },
+    enabled=config.settings.model_tiering_enabled
+)
+
+
+class AgentService:
+    """
+    Runs the AI agents.
+
+    The async methods run on the caller's event loop via `Runner.run`, so routers
+    and background tasks can await them directly, and pick the model through
+    `model_tier_policy`. There is no sync entry point: the server, worker.py
+    and the benchmarks all run on an event loop.
+
+    Pass `on_partial` to stream the structured output: it is awaited with
+    each field (and each list item) as soon as the model has produced it,
+    and with a "reset" event when the output is being produced again.
+    Runs are always streamed, so callers that join an identical run in
+    flight get its partial output too.
+    """
+
+    async def analyze_resume(self, extracted_text: str, use_cache: bool = True, on_partial: PartialCallback = None) -> agent_schemas.ResumeData:
+        # Cache keys use the full model's name: a lite answer that validated is as good
+        agent = build_resume_analysis_agent()
+        agent_input = prompt_compactor.compact_resume_input(extracted_text)
+        cache_key = resume_analysis_cache.make_key(agent_input, RESUME_PROMPT_VERSION, agent.model.model)
+
+        if use_cache:
+            cached = await resume_analysis_cache.get(cache_key)
+            if cached is not None:
+                print("⚡ Resume analysis served from cache")
+                return cached
+
+        async def run(publish: PartialCallback) -> agent_schemas.ResumeData:
+            res = await model_tier_policy.run("resume_analysis", build_resume_analysis_agent, agent_input, publish)
+            await resume_analysis_cache.set(cache_key, res.final_output, RESUME_PROMPT_VERSION, agent.model.model)
+            return res.final_output
+
+        # Identical requests already in flight share one agent run and its partial output
+        return await resume_analysis_flight.do(cache_key, run, on_partial)
+
+    async def analyze_job_fit(self, job_description: str, resume_data: agent_schemas.ResumeData, use_cache: bool = True, on_partial: PartialCallback = None) -> agent_schemas.JobMatchData:
+        agent = build_job_matcher_agent()
+        cache_key = make_job_match_key(job_description, resume_data, JOB_MATCH_PROMPT_VERSION, agent.model.model)
+
+        if use_cache:
+            cached = job_match_cache.get(cache_key)
+            if cached is not None:
+                print("⚡ Job match served from cache")
+                return cached
+
+        async def run(publish: PartialCallback) -> agent_schemas.JobMatchData:
+            res2 = await model_tier_policy.run(
+                "job_match", build_job_matcher_agent, build_job_match_input(job_description, resume_data), publish
+            )
+            job_match_cache.set(cache_key, res2.final_output)
+            return res2.final_output
+
+        # Identical requests already in flight share one agent run and its partial output
+        return await job_match_flight.do(cache_key, run, on_partial)
+
+    async def analyze_resume_and_job_fit(self, extracted_text: str, job_description: str, use_cache: bool = True, on_partial: PartialCallback = None) -> agent_schemas.ResumeJobMatchData:
+        """
+        Analyze a resume and match it against a JD with one model call.
+
+        Both halves are written to the regular resume analysis and job match
+        caches, so a later upload analysis or match reuses them. If the resume
+        analysis is already cached, only the match is run.
+        """
+        agent = build_resume_analysis_agent()
+        model_name = agent.model.model
+        resume_input = prompt_compactor.compact_resume_input(extracted_text)
+        resume_key = resume_analysis_cache.make_key(resume_input, RESUME_PROMPT_VERSION, model_name)
+
+        if use_cache:
+            cached = await resume_analysis_cache.get(resume_key)
+            if cached is not None:
+                print("⚡ Resume analysis served from cache, matching only")
+                match = await self.analyze_job_fit(job_description, cached, use_cache, on_partial)
+                return agent_schemas.ResumeJobMatchData(resume=cached, match=match)
+
+        agent_input = prompt_compactor.compact_combined_input(resume_input, job_description)
+        flight_key = hash_key(COMBINED_PROMPT_VERSION, resume_key, normalize_text(job_description))
+
+        async def run(publish: PartialCallback) -> agent_schemas.ResumeJobMatchData:
+            res = await model_tier_policy.run("resume_and_job_match", build_combined_agent, agent_input, publish)
+            combined: agent_schemas.ResumeJobMatchData = res.final_output
+            await resume_analysis_cache.set(resume_key, combined.resume, RESUME_PROMPT_VERSION, model_name)
+            job_match_cache.set(
+                make_job_match_key(job_description, combined.resume, JOB_MATCH_PROMPT_VERSION, model_name),
+                combined.match
+            )
+            return combined
 
-        return res2.final_output
\ No newline at end of file
+        # Identical requests already in flight share one agent run and its partial output
+        return await resume_and_job_match_flight.do(flight_key, run, on_partial)
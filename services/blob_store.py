@@ -0,0 +1,106 @@
+import hashlib
+import os
+import threading
+import uuid
+from typing import Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+import models
+from core import config
+
+HASH_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+
+class BlobStore:
+    """
+    Content-addressed storage for uploaded resume files.
+
+    Each distinct file is stored once, at a path derived from its SHA-256,
+    so identical uploads share one file on disk. There is no separate
+    refcount: the references are the Resume rows whose file_path points at
+    the blob, and `release()` deletes the file once none are left. Storing
+    and releasing hold one lock so a release can't remove a blob that an
+    upload is putting back in place.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.tmp_dir = os.path.join(root, "tmp")
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        self._lock = threading.Lock()
+
+        self.stored = 0
+        self.deduplicated = 0
+        self.bytes_saved = 0
+        self.deleted = 0
+
+    def path_for(self, sha256: str) -> str:
+        return os.path.join(self.root, sha256[:2], f"{sha256}.pdf")
+
+    def temp_path(self) -> str:
+        """Where to write an upload before its hash is known"""
+        return os.path.join(self.tmp_dir, f"{uuid.uuid4().hex}.part")
+
+    def commit(self, temp_path: str, sha256: str) -> Tuple[str, bool]:
+        """
+        Move a fully written file into the store
+        Returns: (blob path, whether an identical blob was already stored)
+        """
+        path = self.path_for(sha256)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._lock:
+            if os.path.exists(path):
+                self.deduplicated += 1
+                self.bytes_saved += os.path.getsize(temp_path)
+                os.remove(temp_path)
+                return path, True
+            os.replace(temp_path, path)
+            self.stored += 1
+            return path, False
+
+    @staticmethod
+    def hash_file(file_path: str) -> str:
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            while chunk := f.read(HASH_CHUNK_SIZE):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def references(self, db: Session, file_path: str) -> int:
+        return db.query(models.Resume).filter(models.Resume.file_path == file_path).count()
+
+    def release(self, db: Session, file_path: str) -> bool:
+        """Delete a file once no resume references it; call after the referencing row is gone"""
+        with self._lock:
+            if self.references(db, file_path) > 0 or not os.path.exists(file_path):
+                return False
+            try:
+                os.remove(file_path)
+            except Exception as e:
+                print(f"Warning: Could not delete file {file_path}: {str(e)}")
+                return False
+            self.deleted += 1
+            return True
+
+    def find_extracted(self, db: Session, file_path: str) -> Optional[models.Resume]:
+        """A resume of the same file with its text extracted, an analyzed one if there is one"""
+        copies = db.query(models.Resume).filter(
+            models.Resume.file_path == file_path,
+            models.Resume.text_extracted.isnot(None)
+        ).all()
+        analyzed = [resume for resume in copies if resume.status == "analyzed"]
+        return (analyzed or copies or [None])[0]
+
+    def stats(self) -> dict:
+        return {
+            "root": self.root,
+            "stored": self.stored,
+            "deduplicated": self.deduplicated,
+            "bytes_saved": self.bytes_saved,
+            "deleted": self.deleted
+        }
+
+
+# Global instance
+blob_store = BlobStore(config.settings.resume_blob_dir)
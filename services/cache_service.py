@@ -0,0 +1,207 @@
+import hashlib
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.dialects.sqlite import insert
+
+from database import SessionLocal
+import models
+from core import config
+from schemas import agent_schemas
+
+
+def hash_key(*parts: str) -> str:
+    """Build a stable sha256 cache key from the given parts"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace and case so trivially different copies share a key"""
+    return " ".join(text.split()).lower()
+
+
+class TTLCache:
+    """
+    In-memory LRU cache whose entries also expire after `ttl_seconds`.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0
+        }
+
+
+class ResumeAnalysisCache:
+    """
+    Persistent, content-addressed cache of Resume Analysis Agent results.
+
+    Entries are keyed by hash(prompt version, model name, extracted text) and
+    stored in the `resume_analysis_cache` table, so they survive restarts.
+    Once the table grows past `max_entries`, the least recently used rows are
+    evicted. Lookups and writes run in the threadpool, off the event loop;
+    writes are upserts, so processes storing the same analysis don't collide.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(extracted_text: str, prompt_version: str, model_name: str) -> str:
+        return hash_key(prompt_version, model_name, extracted_text)
+
+    async def get(self, key: str) -> Optional[agent_schemas.ResumeData]:
+        """Return the cached ResumeData for `key`, or None on a miss"""
+        return await run_in_threadpool(self._get, key)
+
+    async def set(self, key: str, resume_data: agent_schemas.ResumeData, prompt_version: str, model_name: str):
+        """Store a result and evict least recently used entries beyond the limit"""
+        await run_in_threadpool(self._set, key, resume_data, prompt_version, model_name)
+
+    def _get(self, key: str) -> Optional[agent_schemas.ResumeData]:
+        db = SessionLocal()
+        try:
+            entry = db.query(models.ResumeAnalysisCache).filter(
+                models.ResumeAnalysisCache.cache_key == key
+            ).first()
+
+            if not entry:
+                self.misses += 1
+                return None
+
+            entry.last_accessed_at = datetime.utcnow()
+            entry.hit_count = (entry.hit_count or 0) + 1
+            db.commit()
+
+            self.hits += 1
+            return agent_schemas.ResumeData.model_validate(entry.result)
+        finally:
+            db.close()
+
+    def _set(self, key: str, resume_data: agent_schemas.ResumeData, prompt_version: str, model_name: str):
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            result = resume_data.model_dump()
+            # Another process may have stored the same analysis since our lookup
+            db.execute(
+                insert(models.ResumeAnalysisCache).values(
+                    cache_key=key,
+                    model_name=model_name,
+                    prompt_version=prompt_version,
+                    result=result,
+                    created_at=now,
+                    last_accessed_at=now,
+                    hit_count=0
+                ).on_conflict_do_update(
+                    index_elements=[models.ResumeAnalysisCache.cache_key],
+                    set_={"result": result, "last_accessed_at": now}
+                )
+            )
+            db.commit()
+
+            self._evict(db)
+        finally:
+            db.close()
+
+    def _evict(self, db):
+        total = db.query(models.ResumeAnalysisCache).count()
+        overflow = total - self.max_entries
+        if overflow <= 0:
+            return
+
+        stale_keys = db.query(models.ResumeAnalysisCache.cache_key).order_by(
+            models.ResumeAnalysisCache.last_accessed_at
+        ).limit(overflow).all()
+
+        db.query(models.ResumeAnalysisCache).filter(
+            models.ResumeAnalysisCache.cache_key.in_([key for (key,) in stale_keys])
+        ).delete(synchronize_session=False)
+        db.commit()
+
+        self.evictions += len(stale_keys)
+
+    def stats(self) -> dict:
+        db = SessionLocal()
+        try:
+            size = db.query(models.ResumeAnalysisCache).count()
+        finally:
+            db.close()
+
+        lookups = self.hits + self.misses
+        return {
+            "size": size,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0
+        }
+
+
+def make_job_match_key(job_description: str, resume_data: agent_schemas.ResumeData, prompt_version: str, model_name: str) -> str:
+    """Key a job match by the normalized JD plus a fingerprint of the candidate data"""
+    resume_fingerprint = hash_key(resume_data.model_dump_json())
+    return hash_key(prompt_version, model_name, normalize_text(job_description), resume_fingerprint)
+
+
+# Global instances
+resume_analysis_cache = ResumeAnalysisCache(max_entries=config.settings.resume_cache_max_entries)
+job_match_cache = TTLCache(
+    max_entries=config.settings.job_match_cache_max_entries,
+    ttl_seconds=config.settings.job_match_cache_ttl_seconds
+)
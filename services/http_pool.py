@@ -0,0 +1,150 @@
+import asyncio
+import importlib.util
+import time
+
+import httpx
+from openai import DefaultAsyncHttpxClient
+
+from core import config
+
+# HTTP/2 needs the optional `h2` package (pip install "httpx[http2]")
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class LLMHttpPool:
+    """
+    The one long-lived HTTP client behind every call to the Gemini endpoint.
+
+    Connections are kept alive between agent runs, so TCP and TLS setup is
+    paid once per pooled connection rather than once per match. `warm_up()`
+    opens connections at startup so the first requests don't pay it either.
+    Handshakes are timed through httpcore's trace hook to make that visible.
+    """
+
+    def __init__(
+        self,
+        max_connections: int,
+        max_keepalive_connections: int,
+        keepalive_expiry: float,
+        connect_timeout: float,
+        read_timeout: float,
+        http2: bool = True
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self._client = None
+
+        self.requests = 0
+        self.connections_opened = 0
+        self.handshake_failures = 0
+        self.total_handshake_seconds = 0.0
+        self.max_handshake_seconds = 0.0
+        self.warmed_up = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = DefaultAsyncHttpxClient(
+                limits=self.limits,
+                timeout=self.timeout,
+                http2=self.http2,
+                event_hooks={"request": [self._on_request]}
+            )
+        return self._client
+
+    async def _on_request(self, request: httpx.Request):
+        self.requests += 1
+        request.extensions["trace"] = self._make_trace(request.url.scheme == "https")
+
+    def _make_trace(self, uses_tls: bool):
+        # connect_tcp (+ start_tls) only happen when a new connection is opened
+        handshake_done = "connection.start_tls.complete" if uses_tls else "connection.connect_tcp.complete"
+        started = None
+
+        async def trace(event_name: str, info: dict):
+            nonlocal started
+            if event_name == "connection.connect_tcp.started":
+                started = time.perf_counter()
+            elif event_name in ("connection.connect_tcp.failed", "connection.start_tls.failed"):
+                self.handshake_failures += 1
+            elif event_name == handshake_done and started is not None:
+                elapsed = time.perf_counter() - started
+                self.connections_opened += 1
+                self.total_handshake_seconds += elapsed
+                self.max_handshake_seconds = max(self.max_handshake_seconds, elapsed)
+
+        return trace
+
+    async def warm_up(self, base_url: str, connections: int) -> int:
+        """Open up to `connections` pooled connections; returns how many succeeded"""
+        if connections <= 0:
+            return 0
+
+        async def touch() -> bool:
+            try:
+                # Any response means the connection is up; the status doesn't matter
+                await self.client.get(base_url.rstrip("/") + "/models")
+                return True
+            except httpx.HTTPError as e:
+                print(f"⚠️ LLM connection warm-up failed: {e!r}")
+                return False
+
+        results = await asyncio.gather(*(touch() for _ in range(connections)))
+        self.warmed_up += sum(results)
+        print(f"🔥 Warmed up {sum(results)}/{connections} LLM connections (http2={self.http2})")
+        return sum(results)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _pool_state(self) -> dict:
+        # httpcore keeps no public counters; read its connection list directly
+        pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "_connections", []))
+        requests = list(getattr(pool, "_requests", []))
+        idle = sum(1 for conn in connections if conn.is_idle())
+        return {
+            "open": len(connections),
+            "idle": idle,
+            "active": len(connections) - idle,
+            "requests_in_flight": len(requests),
+            "requests_waiting_for_connection": sum(1 for req in requests if req.is_queued())
+        }
+
+    def stats(self) -> dict:
+        return {
+            "http2": self.http2,
+            "http2_available": HTTP2_AVAILABLE,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "keepalive_expiry": self.limits.keepalive_expiry,
+            "connect_timeout": self.timeout.connect,
+            "read_timeout": self.timeout.read,
+            "connections": self._pool_state(),
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "connection_reuse_rate": round(1 - self.connections_opened / self.requests, 4) if self.requests else 0,
+            "handshake_failures": self.handshake_failures,
+            "avg_handshake_ms": round(self.total_handshake_seconds / self.connections_opened * 1000, 2)
+            if self.connections_opened else 0,
+            "max_handshake_ms": round(self.max_handshake_seconds * 1000, 2),
+            "warmed_up": self.warmed_up
+        }
+
+
+# Global instance
+llm_http_pool = LLMHttpPool(
+    max_connections=config.settings.llm_http_max_connections,
+    max_keepalive_connections=config.settings.llm_http_max_keepalive_connections,
+    keepalive_expiry=config.settings.llm_http_keepalive_expiry,
+    connect_timeout=config.settings.llm_http_connect_timeout,
+    read_timeout=config.settings.llm_http_read_timeout,
+    http2=config.settings.llm_http2
+)
@@ -0,0 +1,203 @@
+import asyncio
+import bisect
+from collections import deque
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from agents.exceptions import ModelBehaviorError
+from agents.usage import Usage
+
+from services.resilience import CircuitOpenError, is_retryable
+
+# USD per 1M tokens (input, output), from the Gemini API price list
+MODEL_PRICING = {
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+}
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = [250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000]
+
+SUCCESS = "success"
+INVALID_OUTPUT = "invalid_output"
+CIRCUIT_OPEN = "circuit_open"
+UPSTREAM_ERROR = "upstream_error"
+CANCELLED = "cancelled"
+ERROR = "error"
+
+
+def classify_outcome(error: Optional[BaseException]) -> str:
+    if error is None:
+        return SUCCESS
+    if isinstance(error, ModelBehaviorError):
+        return INVALID_OUTPUT
+    if isinstance(error, CircuitOpenError):
+        return CIRCUIT_OPEN
+    if isinstance(error, asyncio.CancelledError):
+        return CANCELLED
+    if is_retryable(error):
+        return UPSTREAM_ERROR
+    return ERROR
+
+
+def call_cost_usd(model: str, input_tokens: int, output_tokens: int) -> float:
+    input_price, output_price = MODEL_PRICING.get(model, (0.0, 0.0))
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+class LLMCallMetrics:
+    """
+    Records every agent run against the model.
+
+    Each run (including its retries) is one call, recorded with model,
+    input/output tokens, wall time, retries and outcome. Calls are
+    aggregated per agent and model into a latency histogram with token and
+    cost totals, and the most recent `recent_size` calls are kept for querying.
+    """
+
+    def __init__(self, recent_size: int = 1000):
+        self._recent = deque(maxlen=recent_size)
+        self._series = {}
+
+    def record(
+        self,
+        agent: str,
+        model: str,
+        tier: str,
+        wall_ms: float,
+        retries: int,
+        usage: Optional[Usage] = None,
+        error: Optional[BaseException] = None,
+        repairs: Optional[List[str]] = None
+    ) -> dict:
+        input_tokens = usage.input_tokens if usage else 0
+        output_tokens = usage.output_tokens if usage else 0
+        outcome = classify_outcome(error)
+        cost = call_cost_usd(model, input_tokens, output_tokens)
+
+        call = {
+            "at": datetime.now(timezone.utc).isoformat(),
+            "agent": agent,
+            "model": model,
+            "tier": tier,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "wall_ms": round(wall_ms, 2),
+            "retries": retries,
+            "outcome": outcome,
+            "error": f"{type(error).__name__}: {error}"[:300] if error is not None else None,
+            "repairs": repairs or [],
+            "cost_usd": round(cost, 6)
+        }
+        self._recent.append(call)
+
+        series = self._series.setdefault((agent, model), {
+            "calls": 0,
+            "outcomes": {},
+            "retries": 0,
+            "repaired": 0,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "cost_usd": 0.0,
+            "total_wall_ms": 0.0,
+            "max_wall_ms": 0.0,
+            "latency_buckets": [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        })
+        series["calls"] += 1
+        series["outcomes"][outcome] = series["outcomes"].get(outcome, 0) + 1
+        series["retries"] += retries
+        series["repaired"] += int(bool(repairs))
+        series["input_tokens"] += input_tokens
+        series["output_tokens"] += output_tokens
+        series["cost_usd"] += cost
+        series["total_wall_ms"] += wall_ms
+        series["max_wall_ms"] = max(series["max_wall_ms"], wall_ms)
+        series["latency_buckets"][bisect.bisect_left(LATENCY_BUCKETS_MS, wall_ms)] += 1
+
+        print(
+            f"📊 {agent} on {model}: {wall_ms:.0f} ms, "
+            f"{input_tokens}→{output_tokens} tokens, {retries} retries, {outcome}"
+            + (f", {len(repairs)} repairs" if repairs else "")
+        )
+        return call
+
+    @staticmethod
+    def _percentile_ms(buckets: List[int], total: int, pct: float) -> Optional[float]:
+        """Upper bound of the bucket holding the pct-th percentile (None if above the last bound)"""
+        target = total * pct / 100
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, buckets):
+            seen += count
+            if seen >= target:
+                return bound
+        return None
+
+    def recent(
+        self,
+        agent: Optional[str] = None,
+        model: Optional[str] = None,
+        outcome: Optional[str] = None,
+        min_wall_ms: float = 0,
+        limit: int = 100
+    ) -> List[dict]:
+        """Most recent calls first, filtered"""
+        calls = []
+        for call in reversed(self._recent):
+            if agent and call["agent"] != agent:
+                continue
+            if model and call["model"] != model:
+                continue
+            if outcome and call["outcome"] != outcome:
+                continue
+            if call["wall_ms"] < min_wall_ms:
+                continue
+            calls.append(call)
+            if len(calls) >= limit:
+                break
+        return calls
+
+    def stats(self) -> dict:
+        series_stats = []
+        for (agent, model), series in self._series.items():
+            calls = series["calls"]
+            buckets = series["latency_buckets"]
+            series_stats.append({
+                "agent": agent,
+                "model": model,
+                "calls": calls,
+                "outcomes": series["outcomes"],
+                "retries": series["retries"],
+                "repaired": series["repaired"],
+                "input_tokens": series["input_tokens"],
+                "output_tokens": series["output_tokens"],
+                "avg_input_tokens": round(series["input_tokens"] / calls, 1),
+                "avg_output_tokens": round(series["output_tokens"] / calls, 1),
+                "cost_usd": round(series["cost_usd"], 6),
+                "avg_wall_ms": round(series["total_wall_ms"] / calls, 2),
+                "max_wall_ms": round(series["max_wall_ms"], 2),
+                "p50_wall_ms_le": self._percentile_ms(buckets, calls, 50),
+                "p95_wall_ms_le": self._percentile_ms(buckets, calls, 95),
+                "p99_wall_ms_le": self._percentile_ms(buckets, calls, 99),
+                "latency_histogram_ms": {
+                    **{f"le_{bound}": count for bound, count in zip(LATENCY_BUCKETS_MS, buckets)},
+                    f"gt_{LATENCY_BUCKETS_MS[-1]}": buckets[-1]
+                }
+            })
+
+        return {
+            "pricing_usd_per_million_tokens": {
+                model: {"input": prices[0], "output": prices[1]}
+                for model, prices in MODEL_PRICING.items()
+            },
+            "totals": {
+                "calls": sum(item["calls"] for item in series_stats),
+                "input_tokens": sum(item["input_tokens"] for item in series_stats),
+                "output_tokens": sum(item["output_tokens"] for item in series_stats),
+                "cost_usd": round(sum(item["cost_usd"] for item in series_stats), 6)
+            },
+            "by_agent_model": series_stats
+        }
+
+
+# Global instance
+llm_call_metrics = LLMCallMetrics()
@@ -0,0 +1,167 @@
+import time
+from typing import Callable, Dict
+
+from agents import Agent, Model, Runner, RunResult
+from agents.exceptions import ModelBehaviorError
+from openai.types.responses import ResponseTextDeltaEvent
+
+from services.prompt_service import estimate_tokens
+from services.rate_limiter import llm_rate_limiter
+from services.resilience import llm_retry_policy
+from services.llm_metrics import llm_call_metrics
+from services.output_repair import current_repairs
+from services.partial_json import StreamingObjectParser, PartialCallback, ResettablePartials
+
+LITE = "lite"
+FULL = "full"
+
+# Instructions plus structured output, added to the input estimate when reserving tokens
+OVERHEAD_TOKEN_ESTIMATE = 1000
+
+
+class ModelTierPolicy:
+    """
+    Routes each agent run to the cheapest model tier that can handle it.
+
+    Inputs at or below the agent's complexity threshold (estimated tokens)
+    go to the lite model first. If the lite model's structured output fails
+    validation against the agent's output type (after local repair), the run
+    is escalated to the full model. Inputs above the threshold go straight to the full model.
+
+    When `on_partial` is given, the run is streamed and every field of the
+    structured output is passed to it as soon as it is complete. Before a
+    retry or an escalation re-runs the agent, it is sent a "reset" event if
+    the earlier attempt already passed on partial output.
+    """
+
+    def __init__(self, models: Dict[str, Callable[[], Model]], lite_max_tokens: Dict[str, int], enabled: bool = True):
+        self.models = models
+        self.lite_max_tokens = lite_max_tokens
+        self.enabled = enabled
+        self._tier_stats = {}
+        self._agent_stats = {}
+
+    def choose_tier(self, agent_name: str, agent_input: str) -> str:
+        if not self.enabled:
+            return FULL
+        if estimate_tokens(agent_input) > self.lite_max_tokens.get(agent_name, 0):
+            return FULL
+        return LITE
+
+    async def run(self, agent_name: str, build_agent: Callable[[Model], Agent], agent_input: str, on_partial: PartialCallback = None) -> RunResult:
+        tier = self.choose_tier(agent_name, agent_input)
+        stats = self._agent_stats.setdefault(agent_name, {"runs": 0, "lite_first": 0, "escalations": 0})
+        stats["runs"] += 1
+        if on_partial is not None:
+            on_partial = ResettablePartials(on_partial)
+
+        if tier == LITE:
+            stats["lite_first"] += 1
+            try:
+                return await self._run_tier(agent_name, LITE, build_agent, agent_input, on_partial)
+            except ModelBehaviorError as e:
+                stats["escalations"] += 1
+                print(f"⤴️ {agent_name}: lite output failed validation, escalating ({e})")
+
+        return await self._run_tier(agent_name, FULL, build_agent, agent_input, on_partial)
+
+    async def _run_tier(self, agent_name: str, tier: str, build_agent: Callable[[Model], Agent], agent_input: str, on_partial: ResettablePartials = None) -> RunResult:
+        model = self.models[tier]()
+        stats = self._tier_stats.setdefault(tier, {
+            "model": model.model,
+            "calls": 0,
+            "failures": 0,
+            "total_latency_ms": 0.0,
+            "max_latency_ms": 0.0
+        })
+
+        estimated_tokens = estimate_tokens(agent_input) + OVERHEAD_TOKEN_ESTIMATE
+        attempts = 0
+
+        async def attempt() -> RunResult:
+            nonlocal attempts
+            attempts += 1
+            if on_partial is not None:
+                # Fields of a failed attempt or of the lite model's rejected output
+                await on_partial.reset()
+            # Each attempt queues for the limiter again, so backoff sleeps hold no slot
+            async with llm_rate_limiter.limit(estimated_tokens):
+                return await self._timed_run(stats, model, build_agent, agent_input, on_partial)
+
+        # One recorded call per agent run: wall time covers queueing, retries and backoff
+        started = time.perf_counter()
+        result, error = None, None
+        repairs = []
+        repairs_token = current_repairs.set(repairs)
+        try:
+            result = await llm_retry_policy.call(attempt)
+            return result
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            current_repairs.reset(repairs_token)
+            llm_call_metrics.record(
+                agent=agent_name,
+                model=model.model,
+                tier=tier,
+                wall_ms=(time.perf_counter() - started) * 1000,
+                retries=max(attempts - 1, 0),
+                usage=result.context_wrapper.usage if result is not None else None,
+                error=error,
+                repairs=repairs
+            )
+
+    async def _timed_run(self, stats: dict, model: Model, build_agent: Callable[[Model], Agent], agent_input: str, on_partial: PartialCallback = None) -> RunResult:
+        started = time.perf_counter()
+        try:
+            if on_partial is None:
+                return await Runner.run(
+                    starting_agent=build_agent(model),
+                    input=agent_input,
+                )
+            return await self._streamed_run(build_agent(model), agent_input, on_partial)
+        except Exception:
+            stats["failures"] += 1
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            stats["calls"] += 1
+            stats["total_latency_ms"] += elapsed_ms
+            stats["max_latency_ms"] = max(stats["max_latency_ms"], elapsed_ms)
+
+    async def _streamed_run(self, agent: Agent, agent_input: str, on_partial: PartialCallback) -> RunResult:
+        result = Runner.run_streamed(
+            starting_agent=agent,
+            input=agent_input,
+        )
+        parser = StreamingObjectParser()
+        async for event in result.stream_events():
+            if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+                for partial in parser.feed(event.data.delta):
+                    await on_partial(partial)
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "lite_max_tokens": self.lite_max_tokens,
+            "tiers": {
+                tier: {
+                    "model": stats["model"],
+                    "calls": stats["calls"],
+                    "failures": stats["failures"],
+                    "avg_latency_ms": round(stats["total_latency_ms"] / stats["calls"], 2) if stats["calls"] else 0,
+                    "max_latency_ms": round(stats["max_latency_ms"], 2)
+                }
+                for tier, stats in self._tier_stats.items()
+            },
+            "agents": {
+                agent_name: {
+                    **stats,
+                    "escalation_rate": round(stats["escalations"] / stats["lite_first"], 4)
+                    if stats["lite_first"] else 0
+                }
+                for agent_name, stats in self._agent_stats.items()
+            }
+        }
@@ -0,0 +1,220 @@
+import contextvars
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from agents import AgentOutputSchema
+from agents.exceptions import ModelBehaviorError
+
+from core import config
+
+# Repairs made during the current agent run are appended here when a list is set
+current_repairs: contextvars.ContextVar[Optional[List[str]]] = contextvars.ContextVar("current_repairs", default=None)
+
+
+def extract_json_object(text: str) -> str:
+    """Drop anything around the outermost JSON object, e.g. a ```json fence"""
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        return text
+    return text[start:end + 1]
+
+
+class OutputRepairer:
+    """
+    Deterministically fixes near-miss structured outputs against a JSON schema.
+
+    - arrays: a lone string becomes a one-item list; string items are
+      stripped, blanks and case-insensitive duplicates dropped; lists over
+      maxItems are truncated; lists the model returned short of minItems
+      by at most `max_pad` items are padded from the field's fallback
+      items, if it has any (never a list the deduplication shortened)
+    - integers/numbers: numeric strings and floats are converted and
+      clamped to minimum/maximum
+    - strings: lists are joined, numbers turned into text
+    - a missing required array without minItems becomes []
+    Anything else is left alone, so the output still fails validation.
+    """
+
+    def __init__(self, max_pad: int = 1):
+        self.max_pad = max_pad
+        self._stats = {}
+
+    def repair(self, value: Any, schema: dict, padding: Dict[str, List[str]]) -> Tuple[Any, List[str]]:
+        notes: List[str] = []
+        repaired = self._repair(value, schema, schema.get("$defs", {}), padding, "", notes)
+        return repaired, notes
+
+    def _resolve(self, schema: dict, defs: dict) -> dict:
+        ref = schema.get("$ref")
+        if ref:
+            return self._resolve(defs[ref.split("/")[-1]], defs)
+        return schema
+
+    def _repair(self, value: Any, schema: dict, defs: dict, padding: Dict[str, List[str]], path: str, notes: List[str]) -> Any:
+        schema = self._resolve(schema, defs)
+
+        if "anyOf" in schema:
+            if value is None and any(option.get("type") == "null" for option in schema["anyOf"]):
+                return None
+            options = [option for option in schema["anyOf"] if option.get("type") != "null"]
+            if len(options) == 1:
+                return self._repair(value, options[0], defs, padding, path, notes)
+            return value
+
+        kind = schema.get("type")
+        if kind == "object" and isinstance(value, dict):
+            properties = schema.get("properties", {})
+            for key in schema.get("required", []):
+                child = self._resolve(properties.get(key, {}), defs)
+                if key not in value and child.get("type") == "array" and not child.get("minItems"):
+                    value[key] = []
+                    notes.append(f"{path}{key}: missing, set to []")
+            for key, child in properties.items():
+                if key in value:
+                    value[key] = self._repair(value[key], child, defs, padding, f"{path}{key}.", notes)
+            return value
+
+        field = path.rstrip(".")
+        name = field.rsplit(".", 1)[-1]
+
+        if kind == "array":
+            return self._repair_array(value, schema, defs, padding, field, name, notes)
+        if kind in ("integer", "number"):
+            return self._repair_number(value, schema, kind, field, notes)
+        if kind == "string":
+            if isinstance(value, list):
+                notes.append(f"{field}: list joined into text")
+                return " ".join(str(item) for item in value)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                notes.append(f"{field}: number converted to text")
+                return str(value)
+        return value
+
+    def _repair_array(self, value: Any, schema: dict, defs: dict, padding: Dict[str, List[str]], field: str, name: str, notes: List[str]) -> Any:
+        if isinstance(value, str):
+            notes.append(f"{field}: text wrapped into a list")
+            value = [value]
+        if not isinstance(value, list):
+            return value
+
+        item_schema = schema.get("items", {})
+        deduplicated = False
+        items = [self._repair(item, item_schema, defs, padding, f"{field}[{i}].", notes) for i, item in enumerate(value)]
+
+        if self._resolve(item_schema, defs).get("type") == "string":
+            cleaned, seen = [], set()
+            for item in items:
+                if not isinstance(item, str):
+                    cleaned.append(item)
+                    continue
+                text = item.strip()
+                if text and text.lower() not in seen:
+                    seen.add(text.lower())
+                    cleaned.append(text)
+            if len(cleaned) != len(items):
+                notes.append(f"{field}: dropped {len(items) - len(cleaned)} blank/duplicate items")
+                # Fewer distinct items than the model claimed to give; don't invent replacements
+                deduplicated = True
+            items = cleaned
+
+        max_items = schema.get("maxItems")
+        if max_items is not None and len(items) > max_items:
+            notes.append(f"{field}: truncated {len(items)} → {max_items} items")
+            items = items[:max_items]
+
+        min_items = schema.get("minItems")
+        if min_items is not None and not deduplicated and 0 < min_items - len(items) <= self.max_pad:
+            existing = {str(item).lower() for item in items}
+            fallbacks = [item for item in padding.get(name, []) if item.lower() not in existing]
+            needed = min_items - len(items)
+            if len(fallbacks) >= needed:
+                notes.append(f"{field}: padded {len(items)} → {min_items} items")
+                items = items + fallbacks[:needed]
+        return items
+
+    def _repair_number(self, value: Any, schema: dict, kind: str, field: str, notes: List[str]) -> Any:
+        original = value
+        if isinstance(value, str):
+            try:
+                value = float(value.strip().rstrip("%"))
+            except ValueError:
+                return original
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return original
+        if kind == "integer" and not isinstance(value, int):
+            value = int(round(value))
+        if "minimum" in schema and value < schema["minimum"]:
+            value = schema["minimum"]
+        if "maximum" in schema and value > schema["maximum"]:
+            value = schema["maximum"]
+        if value != original or type(value) is not type(original):
+            notes.append(f"{field}: {original!r} coerced to {value!r}")
+        return value
+
+    def record(self, output_name: str, repaired: bool, notes: List[str]):
+        stats = self._stats.setdefault(output_name, {"invalid": 0, "repaired": 0, "unrepairable": 0, "fields": {}})
+        stats["invalid"] += 1
+        if not repaired:
+            stats["unrepairable"] += 1
+            return
+        stats["repaired"] += 1
+        for note in notes:
+            field = note.split(":", 1)[0]
+            stats["fields"][field] = stats["fields"].get(field, 0) + 1
+
+    def stats(self) -> dict:
+        return {
+            "max_pad": self.max_pad,
+            "outputs": {
+                name: {
+                    **stats,
+                    "repair_rate": round(stats["repaired"] / stats["invalid"], 4) if stats["invalid"] else 0
+                }
+                for name, stats in self._stats.items()
+            }
+        }
+
+
+class RepairingOutputSchema(AgentOutputSchema):
+    """
+    An agent output schema that repairs near-miss outputs before giving up.
+
+    Validation runs as usual first. Only if it fails is the output repaired
+    and validated again, so a ModelBehaviorError (and with it tier
+    escalation or a failed job) is left for outputs the repair can't fix.
+    """
+
+    def __init__(self, output_type: type, padding: Dict[str, List[str]] = None, repairer: "OutputRepairer" = None):
+        super().__init__(output_type, strict_json_schema=True)
+        self.padding = padding or {}
+        self.repairer = repairer or output_repairer
+
+    def validate_json(self, json_str: str) -> Any:
+        try:
+            return super().validate_json(json_str)
+        except ModelBehaviorError as original_error:
+            try:
+                value = json.loads(extract_json_object(json_str))
+            except json.JSONDecodeError:
+                self.repairer.record(self.name(), False, [])
+                raise original_error
+
+            repaired, notes = self.repairer.repair(value, self.json_schema(), self.padding)
+            if json_str.strip() != extract_json_object(json_str).strip():
+                notes.insert(0, "(output): text around the JSON object removed")
+            try:
+                validated = super().validate_json(json.dumps(repaired))
+            except ModelBehaviorError:
+                self.repairer.record(self.name(), False, notes)
+                raise original_error
+
+            self.repairer.record(self.name(), True, notes)
+            repairs = current_repairs.get()
+            if repairs is not None:
+                repairs.extend(notes)
+            print(f"🩹 Repaired {self.name()} output: {'; '.join(notes)}")
+            return validated
+
+
+# Global instance
+output_repairer = OutputRepairer(max_pad=config.settings.output_repair_max_pad)
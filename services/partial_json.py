@@ -0,0 +1,178 @@
+import json
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+# (kind, field, value, index): kind is "field" when a top-level field is complete,
+# "item" when one element of a top-level array is complete (index set), and
+# "reset" when the output is being produced again and earlier events no longer hold
+PartialEvent = Tuple[str, str, Any, Optional[int]]
+PartialCallback = Callable[[PartialEvent], Awaitable[None]]
+
+RESET = "reset"
+RESET_EVENT: PartialEvent = (RESET, None, None, None)
+
+
+class ResettablePartials:
+    """
+    Forwards partial events and remembers whether any were sent, so a
+    re-run (retry or escalation) can first tell the receiver to discard them.
+    """
+
+    def __init__(self, on_partial: PartialCallback):
+        self.on_partial = on_partial
+        self.sent = False
+
+    async def __call__(self, event: PartialEvent):
+        self.sent = True
+        await self.on_partial(event)
+
+    async def reset(self):
+        if self.sent:
+            self.sent = False
+            await self.on_partial(RESET_EVENT)
+
+WHITESPACE = " \t\r\n"
+
+
+class StreamingObjectParser:
+    """
+    Incrementally parses a JSON object as it is streamed in chunks.
+
+    Feed it the model's text deltas; it returns events for everything that
+    became complete in that chunk:
+    - ("item", field, value, index) for each finished element of a
+      top-level array, e.g. one skill at a time
+    - ("field", field, value, None) for each finished top-level field
+    Anything before the opening brace (e.g. a ```json fence) is ignored.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.done = False
+
+        # Top-level object state: "key" -> "colon" -> "value"
+        self.expect = "key"
+        self.key_start = None
+        self.current_key = None
+        self.value_start = None
+        self.value_is_array = False
+
+        # Top-level array element state
+        self.item_start = None
+        self.item_index = 0
+
+        self.fields = {}
+
+    def feed(self, chunk: str) -> List[PartialEvent]:
+        events: List[PartialEvent] = []
+        self.buffer += chunk
+
+        while self.pos < len(self.buffer) and not self.done:
+            char = self.buffer[self.pos]
+
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == "\\":
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+                    self._string_closed(events)
+                self.pos += 1
+                continue
+
+            if self.depth == 0:
+                if char == "{":
+                    self.depth = 1
+                self.pos += 1
+                continue
+
+            if self.depth == 1:
+                self._top_level_char(char, events)
+            else:
+                self._nested_char(char, events)
+            self.pos += 1
+
+        return events
+
+    def _top_level_char(self, char: str, events: List[PartialEvent]):
+        if self.expect == "key":
+            if char == '"':
+                self.in_string = True
+                self.key_start = self.pos
+            elif char == "}":
+                self.done = True
+        elif self.expect == "colon":
+            if char == ":":
+                self.expect = "value"
+                self.value_start = None
+        elif self.expect == "value":
+            if self.value_start is None:
+                if char in WHITESPACE:
+                    return
+                self.value_start = self.pos
+                if char in "[{":
+                    self.depth += 1
+                    self.value_is_array = char == "["
+                    self.item_start = None
+                    self.item_index = 0
+                elif char == '"':
+                    self.in_string = True
+            elif char in ",}":
+                # End of a number/true/false/null value
+                self._emit_field(self.buffer[self.value_start:self.pos], events)
+                if char == "}":
+                    self.done = True
+
+    def _nested_char(self, char: str, events: List[PartialEvent]):
+        at_array_level = self.value_is_array and self.depth == 2
+
+        if at_array_level and self.item_start is None and char not in WHITESPACE + ",]":
+            self.item_start = self.pos
+
+        if char == '"':
+            self.in_string = True
+        elif char in "[{":
+            self.depth += 1
+        elif char in "]}":
+            if at_array_level:
+                self._emit_item(self.buffer[self.item_start:self.pos] if self.item_start is not None else "", events)
+            self.depth -= 1
+            if self.depth == 1:
+                self._emit_field(self.buffer[self.value_start:self.pos + 1], events)
+        elif char == "," and at_array_level:
+            self._emit_item(self.buffer[self.item_start:self.pos], events)
+
+    def _string_closed(self, events: List[PartialEvent]):
+        if self.depth == 1 and self.expect == "key":
+            self.current_key = json.loads(self.buffer[self.key_start:self.pos + 1])
+            self.expect = "colon"
+        elif self.depth == 1 and self.expect == "value":
+            # A top-level string value just ended
+            self._emit_field(self.buffer[self.value_start:self.pos + 1], events)
+
+    def _emit_item(self, text: str, events: List[PartialEvent]):
+        self.item_start = None
+        text = text.strip()
+        if not text:
+            return
+        try:
+            value = json.loads(text)
+        except json.JSONDecodeError:
+            return
+        events.append(("item", self.current_key, value, self.item_index))
+        self.item_index += 1
+
+    def _emit_field(self, text: str, events: List[PartialEvent]):
+        self.expect = "key"
+        self.value_start = None
+        self.value_is_array = False
+        try:
+            value = json.loads(text.strip())
+        except json.JSONDecodeError:
+            return
+        self.fields[self.current_key] = value
+        events.append(("field", self.current_key, value, None))
@@ -0,0 +1,216 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, List, Tuple, Union
+
+from core import config
+from services.pdf_service import PAGE_BREAK, extract_page_range, validate_and_extract_head
+
+
+def _timed(fn: Callable, *args):
+    """Runs in the worker: the result plus the time spent producing it"""
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def _worker_context():
+    """Recycling workers rules out "fork"; forkserver children start with the parser already imported"""
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(["services.pdf_service"])
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+class PDFExtractionPool:
+    """
+    Dedicated worker processes for CPU-bound PDF parsing.
+
+    Extraction stays off the event loop and out of the threadpool that
+    serves sync route handlers, so a large PDF can't hold the GIL against
+    unrelated requests. At most `max_workers` documents are handed to the
+    pool at once; the rest wait here, which is what the queue depth counts
+    and why `timeout` only covers parsing, not waiting. A document that runs
+    past the timeout has its pool killed and replaced. Workers are recycled
+    after `max_tasks_per_child` documents to bound MuPDF memory growth.
+
+    Documents longer than `shard_pages` are split: the first worker validates
+    the PDF and extracts its first `shard_pages` pages, the remaining pages
+    are spread over the workers as contiguous ranges, and the parts are
+    joined once in page order. The timeout then applies per range.
+    """
+
+    def __init__(self, max_workers: int, timeout: float, max_tasks_per_child: int = 0, shard_pages: int = 0):
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.max_tasks_per_child = max_tasks_per_child or None
+        self.shard_pages = shard_pages
+        self._executor = None
+        self._generation = 0
+        self._slots = None
+
+        self.queued = 0
+        self.max_queue_depth = 0
+        self.in_flight = 0
+        self.submitted = 0
+        self.completed = 0
+        self.invalid = 0
+        self.timed_out = 0
+        self.crashed = 0
+        self.restarts = 0
+        self.sharded_documents = 0
+        self.shards = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.total_extract_ms = 0.0
+        self.max_extract_ms = 0.0
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=_worker_context(),
+                max_tasks_per_child=self.max_tasks_per_child
+            )
+        return self._executor
+
+    def _restart(self, kill: bool = False):
+        """Drop the current pool (killing its workers if asked); the next document starts a new one"""
+        executor, self._executor = self._executor, None
+        self._generation += 1
+        self.restarts += 1
+        if executor is None:
+            return
+        if kill:
+            # A stuck worker never returns, and shutdown() can't interrupt it
+            for process in list((executor._processes or {}).values()):
+                process.kill()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    async def extract_file(self, file_path: str) -> str:
+        """Validate and extract a PDF on disk; raises ValueError with the reason"""
+        return await self._extract(file_path)
+
+    async def extract_bytes(self, content: bytes) -> str:
+        """Validate and extract an in-memory PDF; raises ValueError with the reason"""
+        return await self._extract(content)
+
+    def page_ranges(self, page_count: int) -> List[Tuple[int, int]]:
+        """Ranges for the pages after the first shard: one per worker, none shorter than a shard"""
+        start = self.shard_pages
+        remaining = page_count - start
+        if remaining <= 0:
+            return []
+        size = max(self.shard_pages, -(-remaining // self.max_workers))
+        return [(first, min(first + size, page_count)) for first in range(start, page_count, size)]
+
+    async def _extract(self, source: Union[str, bytes]) -> str:
+        head, page_count = await self._run(validate_and_extract_head, source, self.shard_pages or None)
+        parts = [head]
+
+        ranges = self.page_ranges(page_count) if self.shard_pages else []
+        if ranges:
+            self.sharded_documents += 1
+            self.shards += len(ranges) + 1
+            parts += await asyncio.gather(*(
+                self._run(extract_page_range, source, start, stop) for start, stop in ranges
+            ))
+
+        text = PAGE_BREAK.join(parts).strip()
+        if not text:
+            raise ValueError("No text content found in PDF")
+        return text
+
+    async def _run(self, fn: Callable, *args):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+
+        self.queued += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queued)
+        waited_from = time.perf_counter()
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+        wait_ms = (time.perf_counter() - waited_from) * 1000
+        self.total_wait_ms += wait_ms
+        self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+
+        self.in_flight += 1
+        self.submitted += 1
+        try:
+            # One retry when another document's timeout or crash took our pool down
+            for attempt in range(2):
+                generation = self._generation
+                loop = asyncio.get_running_loop()
+                future = loop.run_in_executor(self.executor, _timed, fn, *args)
+                try:
+                    result, extract_ms = await asyncio.wait_for(future, timeout=self.timeout)
+                except asyncio.TimeoutError:
+                    self.timed_out += 1
+                    if generation == self._generation:
+                        self._restart(kill=True)
+                    print(f"⏱️ PDF extraction timed out after {self.timeout:.0f}s")
+                    raise ValueError(f"PDF extraction timed out after {self.timeout:.0f}s")
+                except BrokenProcessPool:
+                    if generation != self._generation and attempt == 0:
+                        continue
+                    self.crashed += 1
+                    if generation == self._generation:
+                        self._restart()
+                    # e.g. a malformed PDF crashed MuPDF
+                    raise ValueError("PDF extraction worker crashed")
+                except ValueError:
+                    self.invalid += 1
+                    raise
+
+                self.completed += 1
+                self.total_extract_ms += extract_ms
+                self.max_extract_ms = max(self.max_extract_ms, extract_ms)
+                return result
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        finished = self.completed + self.invalid
+        return {
+            "workers": self.max_workers,
+            "max_tasks_per_child": self.max_tasks_per_child,
+            "timeout_seconds": self.timeout,
+            "queue_depth": self.queued,
+            "max_queue_depth": self.max_queue_depth,
+            "in_flight": self.in_flight,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "invalid": self.invalid,
+            "timed_out": self.timed_out,
+            "crashed": self.crashed,
+            "restarts": self.restarts,
+            "shard_pages": self.shard_pages,
+            "sharded_documents": self.sharded_documents,
+            "shards": self.shards,
+            "avg_wait_ms": round(self.total_wait_ms / self.submitted, 2) if self.submitted else 0,
+            "max_wait_ms": round(self.max_wait_ms, 2),
+            "avg_extract_ms": round(self.total_extract_ms / self.completed, 2) if self.completed else 0,
+            "max_extract_ms": round(self.max_extract_ms, 2),
+            "invalid_rate": round(self.invalid / finished, 4) if finished else 0
+        }
+
+
+# Global instance
+pdf_extraction_pool = PDFExtractionPool(
+    max_workers=config.settings.pdf_extract_workers,
+    timeout=config.settings.pdf_extract_timeout_seconds,
+    max_tasks_per_child=config.settings.pdf_extract_max_tasks_per_child,
+    shard_pages=config.settings.pdf_extract_shard_pages
+)
@@ -1,63 +1,8 @@
-# import os
-# import fitz
-# from fastapi import HTTPException, status
-# from typing import Tuple
-# import magic
-
-# class PDFService:
-#     MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
-#     ALLOWED_MIME_TYPES = ['application/pdf']
-    
-#     @staticmethod
-#     def validate_pdf(file_path: str) -> Tuple[bool, str]:
-#         """
-#         Validate PDF file
-#         Returns: (is_valid, error_message)
-#         """
-#         # Check if file exists
-#         if not os.path.exists(file_path):
-#             return False, "File not found"
-        
-#         # Check file size
-#         file_size = os.path.getsize(file_path)
-#         if file_size > PDFService.MAX_FILE_SIZE:
-#             return False, f"File size ({file_size/1024/1024:.2f}MB) exceeds 10MB limit"
-        
-#         # Basic PDF validation - try to open it
-#         try:
-#             with fitz.open(file_path) as doc:
-#                 if not doc:
-#                     return False, "Invalid PDF file - cannot be opened"
-#                 # Optional: Check if PDF is encrypted/password protected
-#                 if doc.needs_pass:
-#                     return False, "PDF is password protected"
-#         except Exception as e:
-#             return False, f"Invalid PDF file: {str(e)}"
-        
-#         return True, "Valid PDF"
-    
-#     @staticmethod
-#     def extract_text_from_pdf(file_path: str) -> str:
-#         """
-#         Extract text from PDF using PyMuPDF
-#         """
-#         try:
-#             text = ""
-#             with fitz.open(file_path) as doc:
-#                 for page in doc:
-#                     text += page.get_text()
-#             return text.strip()
-#         except Exception as e:
-#             raise HTTPException(
-#                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-#                 detail=f"Failed to extract text from PDF: {str(e)}"
-#             )
-
-
 import os
 import fitz  # PyMuPDF
 from fastapi import HTTPException, status
-from typing import Tuple
+from typing import Optional, Tuple, Union
+
 
 class PDFService:
     MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
@@ -104,20 +49,71 @@ class PDFService:
         Extract text from PDF using PyMuPDF (fitz)
         """
         try:
-            text = ""
-            with fitz.open(file_path) as doc:
-                for page in doc:
-                    text += page.get_text()
-            
-            # Return stripped text or error if empty
-            text = text.strip()
-            if not text:
-                raise ValueError("No text content found in PDF")
-            
-            return text
+            return extract_text(file_path)
             
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to extract text from PDF: {str(e)}"
-            )
\ No newline at end of file
+            )
+
+
+# ============ WORKER FUNCTIONS ============
+# Module-level so services.pdf_pool can send them to worker processes.
+# A source is either a file path or the PDF's bytes.
+
+# Separates pages in extracted text, so later steps can tell headers and footers from content
+PAGE_BREAK = "\f"
+
+def open_source(source: Union[str, bytes]) -> fitz.Document:
+    if isinstance(source, bytes):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+
+def document_text(doc: fitz.Document, start: int = 0, stop: Optional[int] = None) -> str:
+    """Text of pages [start, stop) of an open document, joined once in page order"""
+    stop = doc.page_count if stop is None else min(stop, doc.page_count)
+    return PAGE_BREAK.join([doc[number].get_text() for number in range(start, stop)])
+
+
+def extract_text(file_path: str) -> str:
+    """Extract text from a PDF; raises ValueError if it has none"""
+    with fitz.open(file_path) as doc:
+        text = document_text(doc).strip()
+    
+    if not text:
+        raise ValueError("No text content found in PDF")
+    
+    return text
+
+
+def validate_and_extract_head(source: Union[str, bytes], stop: Optional[int] = None) -> Tuple[str, int]:
+    """
+    Validate a PDF and extract its first `stop` pages (all by default) in the same open
+    Returns: (text of those pages, page count); raises ValueError with the reason
+    """
+    size = len(source) if isinstance(source, bytes) else os.path.getsize(source)
+    if size > PDFService.MAX_FILE_SIZE:
+        raise ValueError(f"File size ({size/1024/1024:.2f}MB) exceeds 10MB limit")
+    
+    try:
+        with open_source(source) as doc:
+            if doc.needs_pass:
+                raise ValueError("PDF is password protected")
+            if doc.page_count == 0:
+                raise ValueError("PDF file is empty")
+            return document_text(doc, 0, stop), doc.page_count
+    except ValueError:
+        raise
+    except Exception as e:
+        raise ValueError(f"Invalid PDF file: {str(e)}")
+
+
+def extract_page_range(source: Union[str, bytes], start: int, stop: int) -> str:
+    """Text of pages [start, stop) of an already validated PDF; raises ValueError on failure"""
+    try:
+        with open_source(source) as doc:
+            return document_text(doc, start, stop)
+    except Exception as e:
+        raise ValueError(f"Failed to extract pages {start + 1}-{stop}: {str(e)}")
@@ -0,0 +1,162 @@
+import re
+from collections import Counter
+from typing import List
+
+from core import config
+from schemas import agent_schemas
+from services.pdf_service import PAGE_BREAK
+
+# Rough Gemini/OpenAI average for English text
+CHARS_PER_TOKEN = 4
+
+PAGE_NUMBER_PATTERN = re.compile(r"^(page\s*)?[-–—]?\s*\d{1,3}\s*((of|/)\s*\d{1,3})?\s*[-–—]?$", re.IGNORECASE)
+BOILERPLATE_PATTERNS = [
+    re.compile(r"^references?\s+(are\s+)?available\s+(up)?on\s+request\.?$", re.IGNORECASE),
+    re.compile(r"^(curriculum\s+vitae|resume|résumé|cv)$", re.IGNORECASE),
+]
+INLINE_SPACE_PATTERN = re.compile(r"[ \t\u00a0\u2000-\u200b\u3000]+")
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def normalize_whitespace(text: str) -> str:
+    """Collapse runs of spaces within lines and drop blank lines"""
+    lines = (INLINE_SPACE_PATTERN.sub(" ", line).strip() for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def strip_page_numbers(lines: List[str]) -> List[str]:
+    """A page's lines without a page number as its first or last line"""
+    last = len(lines) - 1
+    return [
+        line for index, line in enumerate(lines)
+        if not (index in (0, last) and PAGE_NUMBER_PATTERN.match(line))
+    ]
+
+
+def strip_boilerplate(pages: List[str]) -> str:
+    """
+    Drop stock phrases, page numbers and headers/footers from whitespace-normalized pages.
+    A header/footer is a page's first or last line that is also the first or last line
+    of at least half the pages (and two or more); lines repeated within the body, like
+    job titles, are content.
+    """
+    pages = [strip_page_numbers(page.split("\n")) if page else [] for page in pages]
+
+    edge_counts = Counter()
+    for lines in pages:
+        edge_counts.update({line.lower() for line in lines[:1] + lines[-1:]})
+    repeats_needed = max(2, (len(pages) + 1) // 2)
+
+    kept = []
+    seen_repeated = set()
+    for lines in pages:
+        for index, line in enumerate(lines):
+            key = line.lower()
+            if any(pattern.match(line) for pattern in BOILERPLATE_PATTERNS):
+                continue
+            if index in (0, len(lines) - 1) and edge_counts[key] >= repeats_needed:
+                # Keep the first copy, it can still carry the candidate's name
+                if key in seen_repeated:
+                    continue
+                seen_repeated.add(key)
+            kept.append(line)
+    return "\n".join(kept)
+
+
+def truncate_to_budget(text: str, budget_tokens: int) -> str:
+    """Cut text to the token budget, on a line boundary where possible"""
+    max_chars = budget_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+
+    cut = text.rfind("\n", 0, max_chars)
+    return text[:cut if cut > max_chars // 2 else max_chars]
+
+
+class PromptCompactor:
+    """
+    Shrinks agent inputs before they are sent to the model.
+
+    - resume text: whitespace normalized, boilerplate removed
+    - job description: whitespace normalized
+    - candidate data: compact JSON (no indentation, no nulls)
+    Each agent input is then cut to its configured token budget. Savings are
+    tracked per agent so they can be reported.
+    """
+
+    def __init__(self, resume_budget: int, job_match_budget: int):
+        self.resume_budget = resume_budget
+        self.job_match_budget = job_match_budget
+        self._stats = {}
+
+    def _record(self, agent: str, original: str, compacted: str, truncated: bool):
+        stats = self._stats.setdefault(agent, {
+            "calls": 0,
+            "original_tokens": 0,
+            "compacted_tokens": 0,
+            "tokens_saved": 0,
+            "truncated": 0
+        })
+        original_tokens = estimate_tokens(original)
+        compacted_tokens = estimate_tokens(compacted)
+        stats["calls"] += 1
+        stats["original_tokens"] += original_tokens
+        stats["compacted_tokens"] += compacted_tokens
+        stats["tokens_saved"] += original_tokens - compacted_tokens
+        stats["truncated"] += int(truncated)
+
+    def compact_resume_input(self, extracted_text: str) -> str:
+        pages = [normalize_whitespace(page) for page in extracted_text.split(PAGE_BREAK)]
+        compacted = strip_boilerplate(pages)
+        budgeted = truncate_to_budget(compacted, self.resume_budget)
+        self._record("resume_analysis", extracted_text, budgeted, budgeted != compacted)
+        return budgeted
+
+    def compact_job_match_input(self, job_description: str, resume_data: agent_schemas.ResumeData) -> str:
+        candidate_data_json = resume_data.model_dump_json(exclude_none=True)
+        job_text = normalize_whitespace(job_description)
+
+        # The candidate data is small and structured; the JD gets what is left of the budget
+        job_budget = max(self.job_match_budget - estimate_tokens(candidate_data_json), 0)
+        budgeted_job_text = truncate_to_budget(job_text, job_budget)
+
+        compacted = f'"job_description": {budgeted_job_text},\n"candidate_data": {candidate_data_json}'
+        original = f'"job_description": {job_description},\n"candidate_data": {resume_data.model_dump_json(indent=2)}'
+        self._record("job_match", original, compacted, budgeted_job_text != job_text)
+        return compacted
+
+    def compact_combined_input(self, resume_input: str, job_description: str) -> str:
+        """Join an already compacted resume text with the JD for the combined agent"""
+        job_text = normalize_whitespace(job_description)
+        budgeted_job_text = truncate_to_budget(job_text, self.job_match_budget)
+
+        compacted = f'"job_description": {budgeted_job_text},\n"resume_text": {resume_input}'
+        original = f'"job_description": {job_description},\n"resume_text": {resume_input}'
+        self._record("resume_and_job_match", original, compacted, budgeted_job_text != job_text)
+        return compacted
+
+    def stats(self) -> dict:
+        return {
+            "budgets": {
+                "resume_analysis": self.resume_budget,
+                "job_match": self.job_match_budget
+            },
+            "agents": {
+                agent: {
+                    **stats,
+                    "saved_ratio": round(stats["tokens_saved"] / stats["original_tokens"], 4)
+                    if stats["original_tokens"] else 0
+                }
+                for agent, stats in self._stats.items()
+            }
+        }
+
+
+# Global instance
+prompt_compactor = PromptCompactor(
+    resume_budget=config.settings.resume_agent_token_budget,
+    job_match_budget=config.settings.job_match_agent_token_budget
+)
@@ -0,0 +1,135 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+from core import config
+
+
+class TokenBucket:
+    """Refills continuously at `per_minute` units per minute, up to one minute's worth"""
+
+    def __init__(self, per_minute: int):
+        self.per_minute = per_minute
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.updated_at = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.per_minute > 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.per_minute / 60)
+        self.updated_at = now
+
+    def seconds_until(self, amount: float) -> float:
+        """How long until `amount` can be taken (0 if available now)"""
+        if not self.enabled:
+            return 0
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0
+        return (amount - self.tokens) * 60 / self.per_minute
+
+    def take(self, amount: float):
+        if self.enabled:
+            self.tokens -= min(amount, self.capacity)
+
+
+class LLMRateLimiter:
+    """
+    Process-wide admission control for calls to the Gemini endpoint.
+
+    A call is admitted when
+    - fewer than `max_in_flight` calls are running, and
+    - the requests-per-minute and tokens-per-minute buckets can cover it.
+    Callers wait in FIFO order until both hold. A per-minute limit of 0
+    disables that bucket.
+    """
+
+    def __init__(self, max_in_flight: int, requests_per_minute: int, tokens_per_minute: int):
+        self.max_in_flight = max_in_flight
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self._slots = asyncio.Semaphore(max_in_flight)
+        # asyncio.Lock wakes waiters in arrival order, which makes the queue FIFO
+        self._queue = asyncio.Lock()
+
+        self.in_flight = 0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.admitted = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    async def acquire(self, estimated_tokens: int) -> float:
+        """Wait for admission; returns the seconds spent waiting"""
+        started = time.monotonic()
+        self.queue_depth += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        slot_acquired = False
+        try:
+            async with self._queue:
+                await self._slots.acquire()
+                slot_acquired = True
+                while True:
+                    wait = max(
+                        self.request_bucket.seconds_until(1),
+                        self.token_bucket.seconds_until(estimated_tokens)
+                    )
+                    if wait <= 0:
+                        break
+                    await asyncio.sleep(wait)
+                self.request_bucket.take(1)
+                self.token_bucket.take(estimated_tokens)
+        except BaseException:
+            # Cancelled while queued: give the slot back
+            if slot_acquired:
+                self._slots.release()
+            raise
+        finally:
+            self.queue_depth -= 1
+
+        waited = time.monotonic() - started
+        self.in_flight += 1
+        self.admitted += 1
+        self.total_wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        return waited
+
+    def release(self):
+        self.in_flight -= 1
+        self._slots.release()
+
+    @asynccontextmanager
+    async def limit(self, estimated_tokens: int):
+        await self.acquire(estimated_tokens)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> dict:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "admitted": self.admitted,
+            "avg_wait_ms": round(self.total_wait_seconds / self.admitted * 1000, 2) if self.admitted else 0,
+            "max_wait_ms": round(self.max_wait_seconds * 1000, 2),
+            "requests_per_minute": self.request_bucket.per_minute,
+            "tokens_per_minute": self.token_bucket.per_minute,
+            "requests_available": round(self.request_bucket.tokens, 2),
+            "tokens_available": round(self.token_bucket.tokens)
+        }
+
+
+# Global instance
+llm_rate_limiter = LLMRateLimiter(
+    max_in_flight=config.settings.llm_max_in_flight,
+    requests_per_minute=config.settings.llm_requests_per_minute,
+    tokens_per_minute=config.settings.llm_tokens_per_minute
+)
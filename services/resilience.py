@@ -0,0 +1,196 @@
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+import openai
+
+from core import config
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling upstream while the circuit breaker is open"""
+
+    def __init__(self, retry_in: float):
+        self.retry_in = retry_in
+        super().__init__(f"AI service is temporarily unavailable, retry in {retry_in:.0f}s")
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Transient upstream failures only; agent runs have no side effects, so re-running is safe"""
+    if isinstance(error, (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS_CODES
+    return False
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """The server's Retry-After hint, if it sent one"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """
+    Fails fast while the upstream looks unhealthy.
+
+    - closed: calls go through; `failure_threshold` consecutive upstream
+      failures open the circuit
+    - open: calls are rejected with CircuitOpenError for `reset_seconds`
+    - half-open: one trial call goes through; success closes the circuit,
+      failure opens it again
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+
+        self.times_opened = 0
+        self.rejected = 0
+
+    def before_call(self):
+        if self.state == self.CLOSED:
+            return
+
+        if self.state == self.OPEN:
+            elapsed = time.monotonic() - self.opened_at
+            if elapsed < self.reset_seconds:
+                self.rejected += 1
+                raise CircuitOpenError(self.reset_seconds - elapsed)
+            self.state = self.HALF_OPEN
+
+        # Half-open: only one trial call at a time
+        if self._trial_in_flight:
+            self.rejected += 1
+            raise CircuitOpenError(self.reset_seconds)
+        self._trial_in_flight = True
+
+    def record_success(self):
+        self._trial_in_flight = False
+        self.consecutive_failures = 0
+        self.state = self.CLOSED
+
+    def record_failure(self):
+        self._trial_in_flight = False
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+                print(f"🔌 Circuit breaker opened after {self.consecutive_failures} upstream failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def record_ignored(self):
+        """The call failed for a non-upstream reason; it says nothing about health"""
+        self._trial_in_flight = False
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "reset_seconds": self.reset_seconds,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected
+        }
+
+
+class RetryPolicy:
+    """
+    Re-runs a call after transient upstream failures.
+
+    Waits use exponential backoff with full jitter: a random delay between 0
+    and min(max_delay, base_delay * 2^attempt), or the server's Retry-After
+    if that is longer. Every attempt first checks the circuit breaker.
+    """
+
+    def __init__(self, max_attempts: int, base_delay: float, max_delay: float, breaker: CircuitBreaker):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker
+
+        self.calls = 0
+        self.retries = 0
+        self.recovered = 0
+        self.gave_up = 0
+
+    def backoff(self, attempt: int, error: BaseException) -> float:
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        hint = retry_after_seconds(error)
+        if hint is not None:
+            delay = max(delay, min(hint, self.max_delay))
+        return delay
+
+    async def call(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            try:
+                result = await fn()
+            except asyncio.CancelledError:
+                self.breaker.record_ignored()
+                raise
+            except Exception as e:
+                if not is_retryable(e):
+                    self.breaker.record_ignored()
+                    raise
+                self.breaker.record_failure()
+
+                attempt += 1
+                if attempt >= self.max_attempts:
+                    self.gave_up += 1
+                    raise
+
+                delay = self.backoff(attempt, e)
+                self.retries += 1
+                print(f"🔁 Transient AI error ({type(e).__name__}), retry {attempt}/{self.max_attempts - 1} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            self.breaker.record_success()
+            if attempt:
+                self.recovered += 1
+            return result
+
+    def stats(self) -> dict:
+        return {
+            "max_attempts": self.max_attempts,
+            "base_delay": self.base_delay,
+            "max_delay": self.max_delay,
+            "calls": self.calls,
+            "retries": self.retries,
+            "recovered": self.recovered,
+            "gave_up": self.gave_up,
+            "circuit_breaker": self.breaker.stats()
+        }
+
+
+# Global instances
+llm_circuit_breaker = CircuitBreaker(
+    failure_threshold=config.settings.llm_circuit_failure_threshold,
+    reset_seconds=config.settings.llm_circuit_reset_seconds
+)
+llm_retry_policy = RetryPolicy(
+    max_attempts=config.settings.llm_retry_max_attempts,
+    base_delay=config.settings.llm_retry_base_delay,
+    max_delay=config.settings.llm_retry_max_delay,
+    breaker=llm_circuit_breaker
+)
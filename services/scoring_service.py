@@ -0,0 +1,254 @@
+import re
+import math
+import time
+from collections import Counter
+from typing import List, Set
+
+from schemas import job_schemas
+
+# Keeps tech tokens such as "c++", "c#", "node.js" and "ci/cd" intact
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#./-]*")
+MAX_PHRASE_WORDS = 3
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens, with trailing punctuation stripped"""
+    return [token.rstrip("./-") for token in TOKEN_PATTERN.findall((text or "").lower())]
+
+
+def normalize_skill(skill: str) -> str:
+    """Normalize a skill name to its token phrase, e.g. "Node.JS " -> "node.js" """
+    return " ".join(tokenize(skill))
+
+
+def phrase_set(text: str, max_words: int = MAX_PHRASE_WORDS) -> Set[str]:
+    """All 1..max_words word phrases in the text, for constant-time skill lookups"""
+    tokens = tokenize(text)
+    phrases = set()
+    for size in range(1, max_words + 1):
+        for start in range(len(tokens) - size + 1):
+            phrases.add(" ".join(tokens[start:start + size]))
+    return phrases
+
+
+class CandidatePrefilter:
+    """
+    Cheap, deterministic scoring of analyzed resumes against one job description.
+
+    Works only on the structured `skills`/`experience` JSON, so a pool of
+    thousands of resumes can be scored locally before anything is sent to
+    the Job Matcher Agent.
+
+    The JD's required skills are inferred from the pool itself: any skill
+    that some candidate lists and that appears in the JD text counts as a
+    requirement. Each candidate is then scored 0-100 on
+    - skill coverage: share of those required skills they list (70%)
+    - title relevance: share of their position-title words found in the JD (20%)
+    - seniority: total years of experience, capped at 10 (10%)
+    """
+
+    SKILL_WEIGHT = 70
+    TITLE_WEIGHT = 20
+    YEARS_WEIGHT = 10
+    YEARS_CAP = 10
+
+    def __init__(self, job_description: str):
+        self.jd_phrases = phrase_set(job_description)
+
+    def matched_skills(self, skills: List[str]) -> Set[str]:
+        matched = set()
+        for skill in skills or []:
+            normalized = normalize_skill(skill)
+            if normalized and normalized in self.jd_phrases:
+                matched.add(normalized)
+        return matched
+
+    def rank(self, candidates: List[dict]) -> List[dict]:
+        """
+        Score candidates (dicts with "skills" and "experience") and return them
+        sorted best first, each with "prefilter_score" and "matched_skills" added.
+        """
+        matches = [self.matched_skills(candidate.get("skills")) for candidate in candidates]
+        required_skills = set().union(*matches) if matches else set()
+
+        ranked = []
+        for candidate, matched in zip(candidates, matches):
+            experience = candidate.get("experience") or {}
+
+            skill_score = len(matched) / len(required_skills) if required_skills else 0
+
+            title_words = set()
+            for position in experience.get("positions") or []:
+                if isinstance(position, dict):
+                    title_words.update(tokenize(position.get("title", "")))
+            title_score = (
+                len(title_words & self.jd_phrases) / len(title_words) if title_words else 0
+            )
+
+            try:
+                years = float(experience.get("total_years") or 0)
+            except (TypeError, ValueError):
+                years = 0
+            years_score = min(max(years, 0), self.YEARS_CAP) / self.YEARS_CAP
+
+            score = (
+                self.SKILL_WEIGHT * skill_score
+                + self.TITLE_WEIGHT * title_score
+                + self.YEARS_WEIGHT * years_score
+            )
+            ranked.append({
+                **candidate,
+                "prefilter_score": round(score, 2),
+                "matched_skills": sorted(matched)
+            })
+
+        # Deterministic order: best score first, then oldest resume first
+        ranked.sort(key=lambda candidate: (-candidate["prefilter_score"], candidate["resume_id"]))
+        return ranked
+
+
+# Common technical and professional skills looked for in job descriptions.
+# The candidate's own skill list is always added on top of this.
+SKILL_LEXICON = frozenset({
+    # Languages
+    "python", "java", "javascript", "typescript", "c++", "c#", "golang", "rust",
+    "ruby", "php", "kotlin", "swift", "scala", "matlab", "perl", "bash", "sql",
+    "html", "css", "dart", "objective-c", "lua", "haskell", "elixir",
+    # Web and backend
+    "react", "react native", "angular", "vue", "next.js", "node.js", "express.js", "django",
+    "flask", "fastapi", "spring", "spring boot", "asp.net", "laravel", "rails",
+    "graphql", "rest api", "grpc", "websocket", "microservices", "tailwind",
+    "redux", "jquery", "sass",
+    # Data and ML
+    "pandas", "numpy", "scikit-learn", "tensorflow", "pytorch", "keras", "spark",
+    "hadoop", "airflow", "kafka", "dbt", "tableau", "power bi", "excel", "etl",
+    "machine learning", "deep learning", "nlp", "computer vision", "llm", "data analysis",
+    "data science", "statistics", "langchain", "opencv",
+    # Databases
+    "postgresql", "mysql", "sqlite", "mongodb", "redis", "elasticsearch", "cassandra",
+    "dynamodb", "oracle", "snowflake", "bigquery",
+    # Cloud and ops
+    "aws", "azure", "gcp", "docker", "kubernetes", "terraform", "ansible", "jenkins",
+    "ci/cd", "github actions", "linux", "nginx", "serverless", "lambda", "devops",
+    "prometheus", "grafana",
+    # Practices and tools
+    "git", "agile", "scrum", "jira", "tdd", "unit testing", "pytest", "selenium",
+    "oauth", "security", "system design", "design patterns",
+    # Design and mobile
+    "figma", "ui/ux", "photoshop", "android", "ios", "flutter",
+    # Professional
+    "communication", "leadership", "project management", "stakeholder management",
+    "mentoring", "problem solving",
+})
+
+STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in",
+    "is", "it", "its", "of", "on", "or", "our", "that", "the", "their", "this", "to",
+    "we", "will", "with", "you", "your", "who", "what", "can", "able", "must", "should",
+    "would", "plus", "etc", "also", "other", "using", "work", "working", "experience",
+    "years", "year", "strong", "good", "knowledge", "skills", "role", "team", "including",
+    "looking", "ideal", "candidate", "required", "preferred", "responsibilities",
+    "requirements", "ability", "understanding", "excellent", "familiarity", "join",
+})
+
+
+class BM25:
+    """
+    Okapi BM25 term weighting for one query against one document.
+
+    Term vectors are sparse dicts. `idf` defaults to 1 for every term when no
+    corpus statistics are available; query terms are weighted by how often
+    the JD repeats them. The score is normalized to 0-1 against a document
+    that saturates every query term.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, avgdl: float = 400, idf: dict = None):
+        self.k1 = k1
+        self.b = b
+        self.avgdl = avgdl
+        self.idf = idf or {}
+
+    def score(self, query_weights: dict, doc_tf: Counter, doc_len: int) -> float:
+        length_norm = self.k1 * (1 - self.b + self.b * doc_len / self.avgdl)
+        total = 0.0
+        best = 0.0
+        for term, weight in query_weights.items():
+            term_weight = weight * self.idf.get(term, 1.0)
+            tf = doc_tf.get(term, 0)
+            total += term_weight * tf * (self.k1 + 1) / (tf + length_norm)
+            best += term_weight * (self.k1 + 1)
+        return total / best if best else 0.0
+
+
+class LocalFitScorer:
+    """
+    Deterministic, offline fit scoring of one resume against one job description.
+
+    Used as an instant provisional answer before (or instead of) the Job
+    Matcher Agent. The fit score blends
+    - skill overlap: share of the JD's required skills the candidate has (60%)
+    - BM25: how well the resume text covers the JD's key terms (40%)
+    If no known skill is found in the JD, BM25 alone decides the score.
+    """
+
+    SKILL_WEIGHT = 0.6
+    TEXT_WEIGHT = 0.4
+    MAX_ITEMS = 5
+
+    def __init__(self, bm25: BM25 = None):
+        self.bm25 = bm25 or BM25()
+
+    def score(self, job_description: str, resume_skills: List[str], resume_text: str) -> job_schemas.ProvisionalMatch:
+        started = time.perf_counter()
+
+        jd_phrases = phrase_set(job_description)
+        resume_phrases = phrase_set(resume_text)
+
+        candidate_skills = {}
+        for skill in resume_skills or []:
+            normalized = normalize_skill(skill)
+            if normalized:
+                candidate_skills.setdefault(normalized, skill)
+
+        # Skills the JD asks for, in order of first mention
+        required = [
+            skill for skill in SKILL_LEXICON | set(candidate_skills)
+            if skill in jd_phrases
+        ]
+        jd_text = " ".join(tokenize(job_description))
+        required.sort(key=lambda skill: jd_text.find(skill))
+
+        matched = [skill for skill in required if skill in candidate_skills or skill in resume_phrases]
+        missing = [skill for skill in required if skill not in candidate_skills and skill not in resume_phrases]
+
+        # BM25 over the JD's content words
+        query_weights = {}
+        for term in tokenize(job_description):
+            if term not in STOPWORDS and len(term) > 1:
+                query_weights[term] = query_weights.get(term, 0) + 1
+        query_weights = {term: 1 + math.log(count) for term, count in query_weights.items()}
+
+        resume_tokens = tokenize(resume_text) + [
+            token for skill in candidate_skills for token in skill.split()
+        ]
+        text_score = self.bm25.score(query_weights, Counter(resume_tokens), len(resume_tokens))
+
+        if required:
+            skill_score = len(matched) / len(required)
+            fit = self.SKILL_WEIGHT * skill_score + self.TEXT_WEIGHT * text_score
+        else:
+            skill_score = None
+            fit = text_score
+
+        return job_schemas.ProvisionalMatch(
+            fit_score=round(fit * 100),
+            strengths=[candidate_skills.get(skill, skill) for skill in matched[:self.MAX_ITEMS]],
+            missing_skills=missing[:self.MAX_ITEMS],
+            skill_overlap=round(skill_score, 4) if skill_score is not None else None,
+            text_relevance=round(text_score, 4),
+            elapsed_ms=round((time.perf_counter() - started) * 1000, 3)
+        )
+
+
+# Global instance
+local_fit_scorer = LocalFitScorer()
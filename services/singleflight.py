@@ -0,0 +1,108 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from services.partial_json import RESET, RESET_EVENT, PartialCallback, PartialEvent
+
+
+class Flight:
+    """One in-flight execution and the callers streaming its partial output"""
+
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.listeners: List[PartialCallback] = []
+        # Partial events of the current attempt, replayed to callers that join late
+        self.history: List[PartialEvent] = []
+
+    async def publish(self, event: PartialEvent):
+        if event[0] == RESET:
+            self.history = []
+        else:
+            self.history.append(event)
+        for listener in list(self.listeners):
+            try:
+                await listener(event)
+            except Exception as e:
+                # One caller's failing callback must not fail the shared work
+                print(f"⚠️ Partial output callback failed: {e}")
+
+    async def subscribe(self, on_partial: PartialCallback):
+        """Replay what was already streamed, then receive events as they come"""
+        history, sent = self.history, 0
+        while True:
+            if self.history is not history:
+                # The work restarted while we were catching up
+                if sent:
+                    await on_partial(RESET_EVENT)
+                history, sent = self.history, 0
+            if sent >= len(history):
+                break
+            await on_partial(history[sent])
+            sent += 1
+        self.listeners.append(on_partial)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into one in-flight execution.
+
+    The first caller for a key starts the work; everyone arriving while it
+    is still running awaits the same result (or exception) instead of
+    starting their own. The shared work is shielded, so one caller being
+    cancelled (e.g. a closed request) does not cancel it for the others.
+
+    `fn` is given the callback for the work's partial output. Every caller's
+    `on_partial` receives it: callers that join late first get a replay of
+    what was already streamed.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._in_flight: Dict[str, Flight] = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[PartialCallback], Awaitable[Any]], on_partial: PartialCallback = None) -> Any:
+        self.calls += 1
+
+        flight = self._in_flight.get(key)
+        if flight is not None:
+            self.coalesced += 1
+            if on_partial is not None:
+                await flight.subscribe(on_partial)
+        else:
+            self.executions += 1
+            flight = Flight()
+            if on_partial is not None:
+                flight.listeners.append(on_partial)
+            flight.task = asyncio.ensure_future(fn(flight.publish))
+            self._in_flight[key] = flight
+            flight.task.add_done_callback(lambda done: self._forget(key, flight))
+
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            if on_partial in flight.listeners:
+                flight.listeners.remove(on_partial)
+
+    def _forget(self, key: str, flight: Flight):
+        if self._in_flight.get(key) is flight:
+            del self._in_flight[key]
+        # Mark the exception as retrieved even if every caller went away
+        if not flight.task.cancelled():
+            flight.task.exception()
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight),
+            "coalesced_rate": round(self.coalesced / self.calls, 4) if self.calls else 0
+        }
+
+
+# Global instances
+resume_analysis_flight = SingleFlight("resume_analysis")
+job_match_flight = SingleFlight("job_match")
+resume_and_job_match_flight = SingleFlight("resume_and_job_match")
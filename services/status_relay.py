@@ -0,0 +1,192 @@
+import asyncio
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func
+
+import models
+from core import config
+from database import SessionLocal
+from services.websocket_manager import manager
+
+# How often web processes delete relayed messages past their retention
+PRUNE_INTERVAL_SECONDS = 60.0
+
+
+class StatusRelay:
+    """
+    Carries WebSocket messages between processes through the status_events table.
+
+    Tasks run in whichever process leased them, a web process or a
+    standalone worker, while a user's socket lives in one web process. Every
+    process publishes the messages it sends: they are buffered and written
+    in one transaction per flush, so a burst of progress updates costs a
+    single commit. Web processes poll for messages published elsewhere and
+    deliver them to the sockets they hold; messages for sockets held by the
+    publishing process are still sent directly, without waiting for a poll.
+    """
+
+    def __init__(self, poll_interval: float, retention_seconds: float):
+        self.poll_interval = poll_interval
+        self.retention_seconds = retention_seconds
+        self.origin = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._outbox: List[Tuple[int, dict]] = []
+        self._cursor = 0
+        self._last_prune = 0.0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._poll_task: Optional[asyncio.Task] = None
+
+        self.published = 0
+        self.flushes = 0
+        self.flushed_events = 0
+        self.write_failures = 0
+        self.received = 0
+        self.delivered = 0
+        self.pruned = 0
+
+    def publish(self, message: dict, user_id: int):
+        self._outbox.append((user_id, message))
+        self.published += 1
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    # ============ PUBLISHING ============
+
+    def _write(self, events: List[Tuple[int, dict]]):
+        db = SessionLocal()
+        try:
+            db.add_all([
+                models.StatusEvent(user_id=user_id, origin=self.origin, message=message)
+                for user_id, message in events
+            ])
+            db.commit()
+        finally:
+            db.close()
+
+    async def flush(self):
+        if not self._outbox:
+            return
+        events, self._outbox = self._outbox, []
+        try:
+            await run_in_threadpool(self._write, events)
+            self.flushes += 1
+            self.flushed_events += len(events)
+        except Exception as e:
+            # Progress updates are best effort; the task itself carries on
+            self.write_failures += 1
+            print(f"⚠️ Could not publish {len(events)} status updates: {e}")
+
+    async def _flush_loop(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            await self.flush()
+
+    # ============ DELIVERY ============
+
+    def _latest_event_id(self) -> int:
+        db = SessionLocal()
+        try:
+            return db.query(func.max(models.StatusEvent.event_id)).scalar() or 0
+        finally:
+            db.close()
+
+    def _read(self, user_ids: List[int]) -> List[Tuple[int, dict]]:
+        """Messages published elsewhere since the last poll, for users connected here"""
+        db = SessionLocal()
+        try:
+            latest = db.query(func.max(models.StatusEvent.event_id)).scalar() or 0
+            events = []
+            if user_ids and latest > self._cursor:
+                events = db.query(models.StatusEvent.user_id, models.StatusEvent.message).filter(
+                    models.StatusEvent.event_id > self._cursor,
+                    models.StatusEvent.event_id <= latest,
+                    models.StatusEvent.origin != self.origin,
+                    models.StatusEvent.user_id.in_(user_ids)
+                ).order_by(models.StatusEvent.event_id).all()
+            self._cursor = max(self._cursor, latest)
+
+            if time.monotonic() - self._last_prune >= PRUNE_INTERVAL_SECONDS:
+                self._last_prune = time.monotonic()
+                self.pruned += db.query(models.StatusEvent).filter(
+                    models.StatusEvent.created_at < datetime.utcnow() - timedelta(seconds=self.retention_seconds)
+                ).delete(synchronize_session=False)
+                db.commit()
+            return [(user_id, message) for user_id, message in events]
+        finally:
+            db.close()
+
+    async def _poll_loop(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                events = await run_in_threadpool(self._read, manager.connected_users())
+            except Exception as e:
+                print(f"⚠️ Status relay poll failed: {e}")
+                continue
+            self.received += len(events)
+            for user_id, message in events:
+                if manager.get_connection_count(user_id):
+                    await manager.send_local(message, user_id)
+                    self.delivered += 1
+
+    # ============ LIFECYCLE ============
+
+    async def start(self, deliver: bool = True):
+        """
+        Publish this process's messages; with `deliver`, also relay messages
+        published elsewhere to the sockets this process holds.
+        """
+        if self._flush_task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        manager.publisher = self.publish
+        self._flush_task = asyncio.create_task(self._flush_loop())
+        if deliver:
+            # Only messages published from now on; older ones were meant for earlier sockets
+            self._cursor = await run_in_threadpool(self._latest_event_id)
+            self._poll_task = asyncio.create_task(self._poll_loop())
+        print(f"📡 Status relay {self.origin} started ({'publishing and delivering' if deliver else 'publishing'})")
+
+    async def stop(self):
+        """Stop polling and write out what is still buffered"""
+        if self._flush_task is None:
+            return
+        manager.publisher = None
+        tasks = [task for task in (self._flush_task, self._poll_task) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._flush_task = None
+        self._poll_task = None
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "origin": self.origin,
+            "publishing": self._flush_task is not None,
+            "delivering": self._poll_task is not None,
+            "poll_interval_seconds": self.poll_interval,
+            "published": self.published,
+            "pending": len(self._outbox),
+            "flushes": self.flushes,
+            "avg_batch": round(self.flushed_events / self.flushes, 2) if self.flushes else 0,
+            "write_failures": self.write_failures,
+            "received": self.received,
+            "delivered": self.delivered,
+            "pruned": self.pruned
+        }
+
+
+# Global instance
+status_relay = StatusRelay(
+    poll_interval=config.settings.status_relay_poll_interval,
+    retention_seconds=config.settings.status_relay_retention_seconds
+)
@@ -0,0 +1,523 @@
+import asyncio
+import contextvars
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+import models
+from core import config
+from database import SessionLocal
+from services.resilience import CircuitOpenError, is_retryable
+
+QUEUED = "queued"
+LEASED = "leased"
+DONE = "done"
+DEAD = "dead"
+
+# The task the current handler is running: task_id, kind, attempts, max_attempts
+current_task: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("current_task", default=None)
+
+
+def is_transient(error: BaseException) -> bool:
+    """Failures worth running the task again for: upstream LLM trouble"""
+    return isinstance(error, CircuitOpenError) or is_retryable(error)
+
+
+def will_retry(error: BaseException) -> bool:
+    """Whether the queue will run the current task again after this error"""
+    task = current_task.get()
+    return task is not None and task["attempts"] < task["max_attempts"] and is_transient(error)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class TaskQueue:
+    """
+    Durable queue for pipeline tasks, kept in the app database.
+
+    A task is a row in task_queue naming a registered handler (`kind`) and
+    its keyword arguments (`payload`). Workers lease a task with one
+    conditional UPDATE that moves it to `leased` until `visibility_timeout`
+    from now, so several processes can share the table safely. The lease is
+    extended while the handler runs; if the process dies, the lease runs out
+    and another worker takes the task over. Transient failures (upstream LLM
+    errors) are retried with exponential backoff until `max_attempts`; any
+    other failure, or running out of attempts, dead-letters the task with
+    its last error. Finished tasks are pruned after `retention_hours`, dead
+    ones after `dead_retention_hours`. The worker's own database work runs
+    in the threadpool, so a busy database doesn't stall the event loop.
+    """
+
+    def __init__(
+        self,
+        concurrency: int,
+        visibility_timeout: float,
+        max_attempts: int,
+        retry_backoff: float,
+        poll_interval: float,
+        retention_hours: float,
+        dead_retention_hours: float
+    ):
+        self.concurrency = concurrency
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.poll_interval = poll_interval
+        self.retention_hours = retention_hours
+        self.dead_retention_hours = dead_retention_hours
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._handlers: Dict[str, Callable[..., Awaitable]] = {}
+        self._recoverers: Dict[str, Callable[[Session], List[dict]]] = {}
+        self._running: Dict[int, asyncio.Task] = {}
+        self._loop_task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+        self.enqueued = 0
+        self.leased = 0
+        self.completed = 0
+        self.retried = 0
+        self.dead_lettered = 0
+        self.lease_expirations = 0
+        self.recovered = 0
+
+    def register(
+        self,
+        kind: str,
+        handler: Callable[..., Awaitable],
+        recover: Callable[[Session], List[dict]] = None
+    ):
+        """
+        Run `handler(**payload)` for tasks of this kind. `recover(db)` may
+        return payloads for work a crash left unfinished without a task.
+        """
+        self._handlers[kind] = handler
+        if recover:
+            self._recoverers[kind] = recover
+
+    def enqueue(self, db: Session, kind: str, payload: dict, max_attempts: int = None) -> int:
+        task = models.QueuedTask(
+            kind=kind,
+            payload=payload,
+            status=QUEUED,
+            max_attempts=max_attempts or self.max_attempts,
+            available_at=datetime.utcnow()
+        )
+        db.add(task)
+        db.commit()
+        db.refresh(task)
+        self.enqueued += 1
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return task.task_id
+
+    def enqueue_many(self, db: Session, kind: str, payloads: List[dict], max_attempts: int = None) -> List[int]:
+        """Enqueue one task per payload with a single commit"""
+        if not payloads:
+            return []
+        now = datetime.utcnow()
+        tasks = [
+            models.QueuedTask(
+                kind=kind,
+                payload=payload,
+                status=QUEUED,
+                max_attempts=max_attempts or self.max_attempts,
+                available_at=now
+            )
+            for payload in payloads
+        ]
+        db.add_all(tasks)
+        db.commit()
+        self.enqueued += len(tasks)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return [task.task_id for task in tasks]
+
+    # ============ LEASING ============
+
+    @staticmethod
+    def _leasable(now: datetime):
+        return or_(
+            and_(models.QueuedTask.status == QUEUED, models.QueuedTask.available_at <= now),
+            and_(models.QueuedTask.status == LEASED, models.QueuedTask.leased_until < now)
+        )
+
+    def _claim(self, limit: int) -> List[dict]:
+        """Lease up to `limit` tasks in one transaction (runs in the threadpool)"""
+        db = SessionLocal()
+        try:
+            return self._claim_with(db, limit)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _claim_with(self, db: Session, limit: int) -> List[dict]:
+        now = datetime.utcnow()
+        candidates = db.query(models.QueuedTask).filter(
+            self._leasable(now),
+            models.QueuedTask.kind.in_(list(self._handlers))
+        ).order_by(models.QueuedTask.available_at, models.QueuedTask.task_id).limit(limit).all()
+
+        claimed = []
+        for candidate in candidates:
+            task = {
+                "task_id": candidate.task_id,
+                "kind": candidate.kind,
+                "payload": candidate.payload,
+                "attempts": candidate.attempts + 1,
+                "max_attempts": candidate.max_attempts
+            }
+            expired = candidate.status == LEASED
+            this_task = db.query(models.QueuedTask).filter(
+                models.QueuedTask.task_id == task["task_id"],
+                self._leasable(now)
+            )
+
+            if expired and candidate.attempts >= candidate.max_attempts:
+                # Its last attempt died with the worker (or outran the lease)
+                if this_task.update({
+                    models.QueuedTask.status: DEAD,
+                    models.QueuedTask.last_error: "Lease expired on the last attempt",
+                    models.QueuedTask.lease_owner: None,
+                    models.QueuedTask.leased_until: None,
+                    models.QueuedTask.finished_at: now
+                }, synchronize_session=False):
+                    self.dead_lettered += 1
+                    print(f"💀 Task {task['task_id']} ({task['kind']}) dead-lettered: lease expired on the last attempt")
+                continue
+
+            updated = this_task.update({
+                models.QueuedTask.status: LEASED,
+                models.QueuedTask.lease_owner: self.owner,
+                models.QueuedTask.leased_until: now + timedelta(seconds=self.visibility_timeout),
+                models.QueuedTask.attempts: models.QueuedTask.attempts + 1
+            }, synchronize_session=False)
+            # Zero rows means another worker won the race for this task
+            if updated:
+                self.leased += 1
+                self.lease_expirations += int(expired)
+                claimed.append(task)
+        db.commit()
+        return claimed
+
+    async def _finish(self, task: dict, values: dict) -> bool:
+        """Update a task this worker still holds the lease on"""
+        try:
+            updated = await run_in_threadpool(self._finish_sync, task, values)
+        except Exception as e:
+            # The lease runs out and the task is run again, like after a crash
+            print(f"⚠️ Task {task['task_id']} could not be updated: {e}")
+            return False
+        if not updated:
+            print(f"⚠️ Task {task['task_id']} lease was lost before it finished")
+        return updated
+
+    def _finish_sync(self, task: dict, values: dict) -> bool:
+        db = SessionLocal()
+        try:
+            updated = db.query(models.QueuedTask).filter(
+                models.QueuedTask.task_id == task["task_id"],
+                models.QueuedTask.lease_owner == self.owner
+            ).update(values, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+        return bool(updated)
+
+    # ============ EXECUTION ============
+
+    async def _execute(self, task: dict):
+        handler = self._handlers[task["kind"]]
+        current_task.set(task)
+        started = time.perf_counter()
+        try:
+            await handler(**task["payload"])
+        except asyncio.CancelledError:
+            # Shutting down: hand the task back without using up an attempt
+            await self._finish(task, {
+                models.QueuedTask.status: QUEUED,
+                models.QueuedTask.attempts: models.QueuedTask.attempts - 1,
+                models.QueuedTask.available_at: datetime.utcnow(),
+                models.QueuedTask.lease_owner: None,
+                models.QueuedTask.leased_until: None
+            })
+            raise
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"[:2000]
+            if will_retry(e):
+                delay = self.retry_backoff * 2 ** (task["attempts"] - 1)
+                if await self._finish(task, {
+                    models.QueuedTask.status: QUEUED,
+                    models.QueuedTask.available_at: datetime.utcnow() + timedelta(seconds=delay),
+                    models.QueuedTask.last_error: error,
+                    models.QueuedTask.lease_owner: None,
+                    models.QueuedTask.leased_until: None
+                }):
+                    self.retried += 1
+                print(f"🔁 Task {task['task_id']} ({task['kind']}) attempt {task['attempts']} failed, retrying in {delay:.0f}s: {error}")
+            else:
+                if await self._finish(task, {
+                    models.QueuedTask.status: DEAD,
+                    models.QueuedTask.last_error: error,
+                    models.QueuedTask.finished_at: datetime.utcnow(),
+                    models.QueuedTask.lease_owner: None,
+                    models.QueuedTask.leased_until: None
+                }):
+                    self.dead_lettered += 1
+                print(f"💀 Task {task['task_id']} ({task['kind']}) dead-lettered after {task['attempts']} attempts: {error}")
+        else:
+            if await self._finish(task, {
+                models.QueuedTask.status: DONE,
+                models.QueuedTask.finished_at: datetime.utcnow(),
+                models.QueuedTask.lease_owner: None,
+                models.QueuedTask.leased_until: None
+            }):
+                self.completed += 1
+            print(f"✅ Task {task['task_id']} ({task['kind']}) done in {time.perf_counter() - started:.1f}s")
+        finally:
+            self._running.pop(task["task_id"], None)
+            self._wakeup.set()
+
+    def _extend_and_prune(self, running: List[int]):
+        now = datetime.utcnow()
+        db = SessionLocal()
+        try:
+            if running:
+                db.query(models.QueuedTask).filter(
+                    models.QueuedTask.task_id.in_(running),
+                    models.QueuedTask.lease_owner == self.owner
+                ).update({
+                    models.QueuedTask.leased_until: now + timedelta(seconds=self.visibility_timeout)
+                }, synchronize_session=False)
+            db.query(models.QueuedTask).filter(
+                or_(
+                    and_(models.QueuedTask.status == DONE,
+                         models.QueuedTask.finished_at < now - timedelta(hours=self.retention_hours)),
+                    and_(models.QueuedTask.status == DEAD,
+                         models.QueuedTask.finished_at < now - timedelta(hours=self.dead_retention_hours))
+                )
+            ).delete(synchronize_session=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def _heartbeat(self):
+        """Keep leases of running tasks alive and prune finished and dead tasks"""
+        while True:
+            await asyncio.sleep(self.visibility_timeout / 3)
+            try:
+                await run_in_threadpool(self._extend_and_prune, list(self._running))
+            except Exception as e:
+                print(f"⚠️ Task queue heartbeat failed: {e}")
+
+    async def _run(self):
+        heartbeat = asyncio.create_task(self._heartbeat())
+        try:
+            while True:
+                free = self.concurrency - len(self._running)
+                if free > 0:
+                    try:
+                        for task in await run_in_threadpool(self._claim, free):
+                            self._running[task["task_id"]] = asyncio.create_task(self._execute(task))
+                    except Exception as e:
+                        print(f"⚠️ Task queue poll failed: {e}")
+
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            heartbeat.cancel()
+
+    # ============ LIFECYCLE ============
+
+    def recover(self) -> int:
+        """
+        Requeue what a crash on this host left behind: tasks leased by a
+        process that no longer exists, and work registered recoverers find
+        without a pending task. Leases held on other hosts expire on their own.
+        """
+        db = SessionLocal()
+        recovered = 0
+        try:
+            host = socket.gethostname()
+            for task in db.query(models.QueuedTask).filter(models.QueuedTask.status == LEASED).all():
+                owner_host, _, rest = (task.lease_owner or "").partition(":")
+                pid = rest.split(":")[0]
+                if owner_host != host or not pid.isdigit():
+                    continue
+                # Same pid but another owner id: a previous run of this process (e.g. PID 1 in a container)
+                if int(pid) != os.getpid() and _pid_alive(int(pid)):
+                    continue
+                recovered += db.query(models.QueuedTask).filter(
+                    models.QueuedTask.task_id == task.task_id,
+                    models.QueuedTask.lease_owner == task.lease_owner
+                ).update({
+                    models.QueuedTask.status: QUEUED,
+                    models.QueuedTask.available_at: datetime.utcnow(),
+                    models.QueuedTask.lease_owner: None,
+                    models.QueuedTask.leased_until: None
+                }, synchronize_session=False)
+            db.commit()
+
+            for kind, recover in self._recoverers.items():
+                pending = [
+                    task.payload for task in db.query(models.QueuedTask).filter(
+                        models.QueuedTask.kind == kind,
+                        models.QueuedTask.status.in_([QUEUED, LEASED])
+                    ).all()
+                ]
+                for payload in recover(db):
+                    if payload not in pending:
+                        self.enqueue(db, kind, payload)
+                        recovered += 1
+        finally:
+            db.close()
+
+        self.recovered += recovered
+        if recovered:
+            print(f"♻️ Recovered {recovered} unfinished tasks")
+        return recovered
+
+    async def start(self):
+        """Recover unfinished work and start consuming tasks on the running event loop"""
+        if self._loop_task is not None:
+            return
+        await run_in_threadpool(self.recover)
+        self._wakeup = asyncio.Event()
+        self._loop_task = asyncio.create_task(self._run())
+        print(f"📥 Task queue worker {self.owner} started ({self.concurrency} concurrent tasks)")
+
+    async def stop(self):
+        """Stop taking tasks and hand running ones back to the queue"""
+        if self._loop_task is None:
+            return
+        self._loop_task.cancel()
+        running = list(self._running.values())
+        for task in running:
+            task.cancel()
+        await asyncio.gather(self._loop_task, *running, return_exceptions=True)
+        self._loop_task = None
+
+    def requeue_dead(self, db: Session, task_id: int) -> bool:
+        """Give a dead-lettered task a fresh set of attempts"""
+        updated = db.query(models.QueuedTask).filter(
+            models.QueuedTask.task_id == task_id,
+            models.QueuedTask.status == DEAD
+        ).update({
+            models.QueuedTask.status: QUEUED,
+            models.QueuedTask.attempts: 0,
+            models.QueuedTask.available_at: datetime.utcnow(),
+            models.QueuedTask.finished_at: None
+        }, synchronize_session=False)
+        db.commit()
+        if updated and self._wakeup is not None:
+            self._wakeup.set()
+        return bool(updated)
+
+    def stats(self, db: Session, dead_limit: int = 20) -> dict:
+        now = datetime.utcnow()
+
+        def age_seconds(moment: Optional[datetime]) -> Optional[float]:
+            return round((now - moment).total_seconds(), 1) if moment else None
+
+        kinds = {}
+        rows = db.query(
+            models.QueuedTask.kind,
+            models.QueuedTask.status,
+            func.count(models.QueuedTask.task_id),
+            func.min(models.QueuedTask.created_at)
+        ).group_by(models.QueuedTask.kind, models.QueuedTask.status).all()
+        for kind, task_status, count, oldest in rows:
+            entry = kinds.setdefault(kind, {QUEUED: 0, LEASED: 0, DONE: 0, DEAD: 0})
+            entry[task_status] = count
+            if task_status in (QUEUED, LEASED):
+                entry[f"oldest_{task_status}_age_seconds"] = age_seconds(oldest)
+
+        ready = db.query(func.count(models.QueuedTask.task_id)).filter(
+            models.QueuedTask.status == QUEUED,
+            models.QueuedTask.available_at <= now
+        ).scalar()
+        expired = db.query(func.count(models.QueuedTask.task_id)).filter(
+            models.QueuedTask.status == LEASED,
+            models.QueuedTask.leased_until < now
+        ).scalar()
+        dead = db.query(models.QueuedTask).filter(
+            models.QueuedTask.status == DEAD
+        ).order_by(models.QueuedTask.finished_at.desc()).limit(dead_limit).all()
+
+        return {
+            "depth": {
+                "ready": ready,
+                "waiting_to_retry": sum(entry[QUEUED] for entry in kinds.values()) - ready,
+                "leased": sum(entry[LEASED] for entry in kinds.values()),
+                "expired_leases": expired,
+                "dead": sum(entry[DEAD] for entry in kinds.values())
+            },
+            "by_kind": kinds,
+            "this_worker": {
+                "owner": self.owner,
+                "running": self._loop_task is not None,
+                "concurrency": self.concurrency,
+                "in_flight": len(self._running),
+                "enqueued": self.enqueued,
+                "leased": self.leased,
+                "completed": self.completed,
+                "retried": self.retried,
+                "dead_lettered": self.dead_lettered,
+                "lease_expirations_taken_over": self.lease_expirations,
+                "recovered": self.recovered
+            },
+            "settings": {
+                "visibility_timeout_seconds": self.visibility_timeout,
+                "max_attempts": self.max_attempts,
+                "retry_backoff_seconds": self.retry_backoff,
+                "retention_hours": self.retention_hours,
+                "dead_retention_hours": self.dead_retention_hours
+            },
+            "recent_dead": [
+                {
+                    "task_id": task.task_id,
+                    "kind": task.kind,
+                    "payload": task.payload,
+                    "attempts": task.attempts,
+                    "last_error": task.last_error,
+                    "age_seconds": age_seconds(task.created_at),
+                    "finished_at": task.finished_at
+                }
+                for task in dead
+            ]
+        }
+
+
+# Global instance
+task_queue = TaskQueue(
+    concurrency=config.settings.task_queue_concurrency,
+    visibility_timeout=config.settings.task_queue_visibility_timeout,
+    max_attempts=config.settings.task_queue_max_attempts,
+    retry_backoff=config.settings.task_queue_retry_backoff,
+    poll_interval=config.settings.task_queue_poll_interval,
+    retention_hours=config.settings.task_queue_retention_hours,
+    dead_retention_hours=config.settings.task_queue_dead_retention_hours
+)
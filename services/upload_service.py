@@ -0,0 +1,215 @@
+import hashlib
+import os
+from typing import Callable, List, Optional
+
+from fastapi import HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette.requests import ClientDisconnect
+
+# Writes to disk are batched to this size
+WRITE_CHUNK_SIZE = 1024 * 1024  # 1MB
+# Room for multipart boundaries and part headers on top of the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+# PDF readers accept the header anywhere in the first 1KB
+PDF_MAGIC = b"%PDF-"
+PDF_MAGIC_WINDOW = 1024
+
+
+class StreamedUpload:
+    """A file received by PDFUploadStream"""
+
+    def __init__(self, filename: str, file_path: str, size: int, sha256: str, content: bytes):
+        self.filename = filename
+        self.file_path = file_path
+        self.size = size
+        self.sha256 = sha256
+        self.content = content
+
+
+class PDFUploadStream:
+    """
+    Receives one PDF from a multipart/form-data request as it streams in.
+
+    The body is parsed straight off the socket instead of being spooled by
+    FastAPI first, so an upload is refused as soon as the declared length
+    or the running byte count passes `max_bytes`, or its first bytes aren't
+    a PDF header, without reading the rest. Data is hashed (SHA-256) as it
+    arrives and written to `path_for(filename)` in the threadpool. The bytes
+    are also kept, at most `max_bytes` of them, for in-memory extraction.
+    """
+
+    def __init__(self, field_name: str, path_for: Callable[[str], str], max_bytes: int):
+        self.field_name = field_name
+        self.path_for = path_for
+        self.max_bytes = max_bytes
+
+        self.filename: Optional[str] = None
+        self.file_path: Optional[str] = None
+        self.size = 0
+        self._hash = hashlib.sha256()
+        self._parts: List[bytes] = []
+        self._pending: List[bytes] = []
+        self._pending_size = 0
+        self._head = b""
+        self._magic_checked = False
+        self._file = None
+
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+        self._in_file_part = False
+        self._file_done = False
+
+    # ---- parser callbacks (sync, run inside parser.write) ----
+
+    def _on_part_begin(self):
+        self._disposition = b""
+        self._in_file_part = False
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_name += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._disposition)
+        name = options.get(b"name", b"").decode("utf-8", "replace")
+        if name != self.field_name or b"filename" not in options or self._file_done:
+            return
+
+        filename = os.path.basename(options[b"filename"].decode("utf-8", "replace"))
+        if not filename.lower().endswith(".pdf"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Only PDF files are allowed"
+            )
+        self.filename = filename
+        self.file_path = self.path_for(filename)
+        self._in_file_part = True
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if not self._in_file_part:
+            return
+        chunk = data[start:end]
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"File exceeds {self.max_bytes // (1024 * 1024)}MB limit"
+            )
+
+        if not self._magic_checked:
+            self._head += chunk
+            if len(self._head) >= PDF_MAGIC_WINDOW:
+                self._check_magic()
+
+        self._hash.update(chunk)
+        self._parts.append(chunk)
+        self._pending.append(chunk)
+        self._pending_size += len(chunk)
+
+    def _on_part_end(self):
+        if self._in_file_part:
+            self._in_file_part = False
+            self._file_done = True
+            self._check_magic()
+
+    def _check_magic(self):
+        if self._magic_checked:
+            return
+        if PDF_MAGIC not in self._head[:PDF_MAGIC_WINDOW]:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="File is not a PDF"
+            )
+        self._magic_checked = True
+        self._head = b""
+
+    # ---- disk writes (threadpool) ----
+
+    async def _flush(self, force: bool = False):
+        if not self._pending or (self._pending_size < WRITE_CHUNK_SIZE and not force):
+            return
+        if self._file is None:
+            self._file = await run_in_threadpool(open, self.file_path, "wb")
+        data = b"".join(self._pending)
+        self._pending.clear()
+        self._pending_size = 0
+        await run_in_threadpool(self._file.write, data)
+
+    async def _discard(self):
+        if self._file is not None:
+            await run_in_threadpool(self._file.close)
+            self._file = None
+        if self.file_path and os.path.exists(self.file_path):
+            await run_in_threadpool(os.remove, self.file_path)
+
+    async def receive(self, request: Request) -> StreamedUpload:
+        content_type, params = parse_options_header(request.headers.get("content-type", ""))
+        if content_type != b"multipart/form-data" or b"boundary" not in params:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Expected a multipart/form-data upload"
+            )
+
+        # Refuse before reading anything if the client declares an oversized body
+        declared = request.headers.get("content-length")
+        if declared and declared.isdigit() and int(declared) > self.max_bytes + MULTIPART_OVERHEAD:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"File exceeds {self.max_bytes // (1024 * 1024)}MB limit"
+            )
+
+        parser = MultipartParser(params[b"boundary"], {
+            "on_part_begin": self._on_part_begin,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished
+        })
+
+        try:
+            async for chunk in request.stream():
+                parser.write(chunk)
+                await self._flush()
+                if self._file_done:
+                    # Anything after the file part is of no interest
+                    break
+            await self._flush(force=True)
+            if self._file is not None:
+                await run_in_threadpool(self._file.close)
+                self._file = None
+        except ClientDisconnect:
+            await self._discard()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Upload interrupted"
+            )
+        except BaseException:
+            await self._discard()
+            raise
+
+        if not self._file_done or self.size == 0:
+            await self._discard()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"No file uploaded in field '{self.field_name}'"
+            )
+
+        return StreamedUpload(
+            filename=self.filename,
+            file_path=self.file_path,
+            size=self.size,
+            sha256=self._hash.hexdigest(),
+            content=b"".join(self._parts)
+        )
@@ -1,5 +1,5 @@
 from fastapi import WebSocket
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional
 import json
 import asyncio
 
@@ -10,6 +10,8 @@ class ConnectionManager:
     def __init__(self):
         # Store connections by user_id
         self.active_connections: Dict[int, List[WebSocket]] = {}
+        # Set by the status relay so connections held by other processes get messages too
+        self.publisher: Optional[Callable[[dict, int], None]] = None
     
     async def connect(self, websocket: WebSocket, user_id: int):
         """Accept and store a new WebSocket connection"""
@@ -34,7 +36,13 @@ class ConnectionManager:
         print(f"❌ WebSocket disconnected for user {user_id}")
     
     async def send_personal_message(self, message: dict, user_id: int):
-        """Send message to all connections of a specific user"""
+        """Send message to all connections of a specific user, whichever process holds them"""
+        if self.publisher is not None:
+            self.publisher(message, user_id)
+        await self.send_local(message, user_id)
+    
+    async def send_local(self, message: dict, user_id: int):
+        """Send message to the user's connections held by this process"""
         if user_id not in self.active_connections:
             return
         
@@ -57,6 +65,9 @@ class ConnectionManager:
         for user_id in list(self.active_connections.keys()):
             await self.send_personal_message(message, user_id)
     
+    def connected_users(self) -> List[int]:
+        return list(self.active_connections.keys())
+    
     def get_connection_count(self, user_id: int) -> int:
         """Get number of active connections for a user"""
         return len(self.active_connections.get(user_id, []))
@@ -91,4 +102,35 @@ async def send_job_match_status(user_id: int, job_id: int, resume_id: int, statu
         "progress": progress,
         "data": data or {},
         "timestamp": asyncio.get_event_loop().time()
-    }, user_id)
\ No newline at end of file
+    }, user_id)
+
+
+async def send_batch_match_status(user_id: int, batch_id: str, resume_id: int, status: str, message: str, completed: int = 0, total: int = 0, data: dict = None):
+    """Send batch job matching progress update"""
+    await manager.send_personal_message({
+        "type": "batch_match_update",
+        "batch_id": batch_id,
+        "resume_id": resume_id,
+        "status": status,
+        "message": message,
+        "completed": completed,
+        "total": total,
+        "progress": int(completed / total * 100) if total else 0,
+        "data": data or {},
+        "timestamp": asyncio.get_event_loop().time()
+    }, user_id)
+
+
+async def send_bulk_import_status(user_id: int, import_id: str, status: str, message: str, completed: int = 0, total: int = 0, data: dict = None):
+    """Send bulk resume import progress update"""
+    await manager.send_personal_message({
+        "type": "bulk_import_update",
+        "import_id": import_id,
+        "status": status,
+        "message": message,
+        "completed": completed,
+        "total": total,
+        "progress": int(completed / total * 100) if total else 0,
+        "data": data or {},
+        "timestamp": asyncio.get_event_loop().time()
+    }, user_id)
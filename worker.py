@@ -0,0 +1,67 @@
+"""
+Standalone worker for resume analysis and job matching, including batch
+matches and the analyses of bulk-imported resumes.
+
+Runs the same tasks the web processes enqueue, from the shared task queue,
+so AI and PDF work can be scaled apart from the API. Status updates reach
+users through the status relay, whichever web process holds their socket.
+Run as many as needed, next to web processes started with
+TASK_QUEUE_EMBEDDED_WORKER=false:
+
+    python worker.py --concurrency 16
+"""
+import argparse
+import asyncio
+import signal
+
+import models
+from core.config import settings
+from database import engine
+from services.http_pool import llm_http_pool
+from services.pdf_pool import pdf_extraction_pool
+from services.status_relay import status_relay
+from services.task_queue import task_queue
+# Importing the routers registers their task handlers: resume_analysis
+# (uploads and bulk imports), job_match and batch_job_match
+from routers import resume, jobs  # noqa: F401
+
+models.Base.metadata.create_all(bind=engine)
+
+
+async def run(concurrency: int = None):
+    if concurrency:
+        task_queue.concurrency = concurrency
+
+    await llm_http_pool.warm_up(settings.base_url, settings.llm_http_warmup_connections)
+    if settings.status_relay_enabled:
+        await status_relay.start(deliver=False)
+    else:
+        print("⚠️ Status relay disabled: users won't see progress of tasks run here")
+    await task_queue.start()
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stopping.set)
+    await stopping.wait()
+
+    # Running tasks go back to the queue for another worker
+    print(f"🛑 Stopping worker {task_queue.owner}")
+    await task_queue.stop()
+    await status_relay.stop()
+    await llm_http_pool.aclose()
+    pdf_extraction_pool.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--concurrency", type=int, default=None,
+        help=f"tasks run at once (default: TASK_QUEUE_CONCURRENCY, {settings.task_queue_concurrency})"
+    )
+    args = parser.parse_args()
+    asyncio.run(run(args.concurrency))
+
+
+if __name__ == "__main__":
+    main()